@@ -0,0 +1,61 @@
+# Runs before main.py. Finishes a staged update's trial bookkeeping, or rolls
+# it back, before any application module is imported (see
+# utils/updatejournal.py).
+
+# Must match utils/updatejournal.py.
+JOURNAL_FILE = "update_journal.json"
+PREV_DIR = "update_prev"
+
+
+def _fallback_rollback():
+    # utils.updatejournal (or something it imports) is broken, most likely by
+    # the update on trial: put the previous files back straight from the
+    # journal, with nothing but the built-in modules.
+    import json
+    import os
+
+    try:
+        with open(JOURNAL_FILE, "r") as f:
+            journal = json.load(f)
+    except Exception:
+        return False
+    if not isinstance(journal, dict):
+        return False
+
+    print("Rolling back update without utils.updatejournal")
+    new_files = journal.get("new") or []
+    for path in (journal.get("files") or []) + (journal.get("removed") or []):
+        prev_path = PREV_DIR + "/" + path
+        try:
+            os.stat(prev_path)
+        except OSError:
+            prev_path = None
+        try:
+            if prev_path is not None or path in new_files:
+                os.remove(path)
+        except OSError:
+            pass
+        if prev_path is not None:
+            try:
+                os.rename(prev_path, path)
+            except OSError as e:
+                print("Rollback failed for", path, e)
+    try:
+        os.remove(JOURNAL_FILE)
+    except OSError:
+        pass
+    return True
+
+
+try:
+    import utils.updatejournal as UpdateJournal
+except Exception as e:
+    print("Update journal unavailable:", e)
+    if _fallback_rollback():
+        import machine
+        machine.reset()
+else:
+    try:
+        UpdateJournal.bootCheck()
+    except Exception as e:
+        print("Update boot check failed:", e)
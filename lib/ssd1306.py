@@ -33,6 +33,9 @@ class SSD1306(framebuf.FrameBuffer):
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        self._buffer_mv = memoryview(self.buffer)
+        self._all_pages = (1 << self.pages) - 1
+        self._dirty = self._all_pages
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
 
@@ -73,7 +76,7 @@ class SSD1306(framebuf.FrameBuffer):
         ):  # on
             self.write_cmd(cmd)
         self.fill(0)
-        self.show()
+        self.show(full=True)
 
     def poweroff(self):
         self.write_cmd(SET_DISP)
@@ -92,7 +95,80 @@ class SSD1306(framebuf.FrameBuffer):
         self.write_cmd(SET_COM_OUT_DIR | ((rotate & 1) << 3))
         self.write_cmd(SET_SEG_REMAP | (rotate & 1))
 
-    def show(self):
+    # Dirty-page tracking: drawing primitives mark the 8-pixel pages they touch,
+    # and show() only sends those pages.
+    def _mark(self, y0, y1):
+        if y1 < y0:
+            y0, y1 = y1, y0
+        if y1 < 0 or y0 >= self.height:
+            return
+        if y0 < 0:
+            y0 = 0
+        if y1 >= self.height:
+            y1 = self.height - 1
+        for page in range(y0 >> 3, (y1 >> 3) + 1):
+            self._dirty |= 1 << page
+
+    def mark_dirty(self, page=None):
+        if page is None:
+            self._dirty = self._all_pages
+        else:
+            self._dirty |= 1 << page
+
+    def fill(self, c):
+        super().fill(c)
+        self._dirty = self._all_pages
+
+    def pixel(self, x, y, *args):
+        if args:
+            self._mark(y, y)
+        return super().pixel(x, y, *args)
+
+    def hline(self, x, y, w, c):
+        super().hline(x, y, w, c)
+        self._mark(y, y)
+
+    def vline(self, x, y, h, c):
+        super().vline(x, y, h, c)
+        self._mark(y, y + h - 1)
+
+    def line(self, x1, y1, x2, y2, c):
+        super().line(x1, y1, x2, y2, c)
+        self._mark(y1, y2)
+
+    def rect(self, x, y, w, h, c, *args):
+        super().rect(x, y, w, h, c, *args)
+        self._mark(y, y + h - 1)
+
+    def fill_rect(self, x, y, w, h, c):
+        super().fill_rect(x, y, w, h, c)
+        self._mark(y, y + h - 1)
+
+    def text(self, s, x, y, *args):
+        super().text(s, x, y, *args)
+        self._mark(y, y + 7)
+
+    def ellipse(self, x, y, xr, yr, c, *args):
+        super().ellipse(x, y, xr, yr, c, *args)
+        self._mark(y - yr, y + yr)
+
+    def poly(self, *args):
+        super().poly(*args)
+        self._dirty = self._all_pages
+
+    def scroll(self, xstep, ystep):
+        super().scroll(xstep, ystep)
+        self._dirty = self._all_pages
+
+    def blit(self, *args):
+        super().blit(*args)
+        self._dirty = self._all_pages
+
+    def show(self, full=False):
+        if full:
+            self._dirty = self._all_pages
+        if not self._dirty:
+            return
         x0 = 0
         x1 = self.width - 1
         if self.width != 128:
@@ -100,13 +176,29 @@ class SSD1306(framebuf.FrameBuffer):
             col_offset = (128 - self.width) // 2
             x0 += col_offset
             x1 += col_offset
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+
+        width = self.width
+        buf = self._buffer_mv
+        dirty = self._dirty
+        first = -1
+        for page in range(self.pages + 1):
+            if page < self.pages and dirty & (1 << page):
+                if first < 0:
+                    first = page
+                continue
+            if first >= 0:
+                # Flush one contiguous run of changed pages.
+                start = first * width
+                end = page * width
+                self.write_cmd(SET_COL_ADDR)
+                self.write_cmd(x0)
+                self.write_cmd(x1)
+                self.write_cmd(SET_PAGE_ADDR)
+                self.write_cmd(first)
+                self.write_cmd(page - 1)
+                self.write_data(buf[start:end])
+                first = -1
+        self._dirty = 0
 
 
 class SSD1306_I2C(SSD1306):
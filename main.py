@@ -1,22 +1,46 @@
 import utime
 import machine
 from utime import sleep
-import math
+
+try:
+    import uasyncio as asyncio
+except Exception:
+    import asyncio
+
 import utils.i2cdisplay as DisplayI2C
 import utils.led as LED
 import utils.buttons as ButtonPy
 import utils.wifi as WiFi
 import utils.jsonsupport as supportjson
+import utils.httpclient as httpclient
+import utils.nettiming as nettiming
+import utils.metarsnapshot as MetarSnapshot
+import utils.metarschedule as MetarSchedule
+import utils.updatejournal as UpdateJournal
 import updates
 
-time_since_last_metar = 0
 metar_data = None
+wifiStatus = None
+
+# Records currently shown on the LEDs/OLED from a live fetch (not the boot
+# snapshot), so an unchanged poll can skip recomputing and redrawing them.
+_applied_metar = None
+# Boot snapshot shown (marked stale) until the first poll replaces it.
+_stale_metar = None
+
+CONNECTIVITY_CHECK_MS = 5000
+NTP_CHECK_S = 60         # how often the NTP task checks the clock is still synced
+NET_DIAG_SHOW_S = 15     # how long a SYNC long-press shows network timings
+
+# Task wakeups (created in _main, once the event loop exists).
+_sync_event = None      # sync button / reconnect: fetch now
+_display_event = None   # display rows changed: refresh the OLED
+_led_event = None       # new LED request: recompute the strip
+_wifi_lock = None       # only one task may (re)connect WiFi at a time
+_ntp_event = None       # WiFi (re)connected: try an NTP sync now
 
-# One heading per LED index. If left as None, we default to evenly-spaced headings
-# based on LED.LED_COUNT after LEDs are initialized.
-RUNWAY_HEADINGS = None
-LED_BRIGHTNESS = None
-CROSSWIND_THRESHOLD_KTS = None
+# What the LED task should show: ("wind", wind_dir, wind_speed) or ("fill", color).
+_led_request = None
 
 
 def _short(s, max_len=16):
@@ -76,127 +100,400 @@ def _display_update_failure(info):
         line = "No File List"
     elif reason == "download_failed":
         line = "DL Failed"
+    elif reason == "activate_failed":
+        line = "Install Failed"
+    elif reason == "trial_pending":
+        line = "Update Pending"
+    elif reason == "mpy_mismatch":
+        line = "Wrong Firmware"
     else:
         line = _short(reason or "failed")
 
     try:
         DisplayI2C.displayClear()
-        DisplayI2C.display_row3 = title
-        DisplayI2C.display_row6 = _short(line, 16)
+        DisplayI2C.set_row(3, title)
+        DisplayI2C.set_row(6, _short(line, 16))
         # If we have a status code, show it too.
         if wifi_status is not None:
-            DisplayI2C.display_row7 = _short("ERR Code: {}".format(wifi_status), 16)
+            DisplayI2C.set_row(7, _short("ERR Code: {}".format(wifi_status), 16))
         else:
-            DisplayI2C.display_row7 = ""
+            DisplayI2C.set_row(7, "")
         DisplayI2C.displayRefresh()
     except Exception:
         pass
 
 
 def leds_set_colors(wind_dir, wind_speed):
-    global RUNWAY_HEADINGS, LED_BRIGHTNESS, CROSSWIND_THRESHOLD_KTS
+    print(wind_dir, wind_speed)  # Debug: print wind data
+    LED.setWindColors(wind_dir, wind_speed)
 
-    if LED_BRIGHTNESS is None:
-        LED_BRIGHTNESS = 100
-    if CROSSWIND_THRESHOLD_KTS is None:
-        CROSSWIND_THRESHOLD_KTS = 10
+def format_unix_utc(ts):
+    # ts is seconds since 1970-01-01 (integer)
+    tm = utime.gmtime(ts)            # returns (Y,M,D,H,M,S,weekday,yday)
+    return "{:04d}-{:02d}-{:02d} {:02d}:{:02d}Z".format(tm[0], tm[1], tm[2], tm[3], tm[4])
 
-    if RUNWAY_HEADINGS is None:
-        RUNWAY_HEADINGS = supportjson.readFromJSON("RUNWAY_HEADINGS")
 
-    wind_dir = int(wind_dir)
-    wind_speed = float(wind_speed)    
-    runway_headings = RUNWAY_HEADINGS
+def _request_display():
+    if _display_event is not None:
+        _display_event.set()
 
-    if runway_headings is None:
-        return
 
-    print(wind_dir, wind_speed)  # Debug: print wind data
+def _request_leds(request):
+    global _led_request
+    _led_request = request
+    if _led_event is not None:
+        _led_event.set()
+
+
+async def _ensure_wifi():
+    """Reconnect WiFi if the link is down; returns True when connected."""
+    global wifiStatus
+    async with _wifi_lock:
+        if WiFi.wlan is not None and WiFi.wlan.isconnected():
+            return True
+        DisplayI2C.displayClear()
+        wifiStatus = await WiFi.startupWifiAsync()
+        connected = WiFi.wlan is not None and WiFi.wlan.isconnected()
+        # Leave the connect result up long enough to read, except after a
+        # fast reconnect, or when there is a METAR to go back to and nothing
+        # went wrong.
+        shown = _applied_metar is not None or _stale_metar is not None
+        if not (isinstance(wifiStatus, dict) and wifiStatus.get("fast")) and not (connected and shown):
+            await asyncio.sleep(5)
+        DisplayI2C.displayClear()
+        # The connect screens replaced the METAR on the OLED; put it back
+        # rather than leaving the board blank until the next poll.
+        if _applied_metar is not None:
+            _apply_metar(_applied_metar)
+        elif _stale_metar is not None:
+            _apply_metar(_stale_metar, stale=True)
+            _set_net_state_row()
+    if connected and _ntp_event is not None:
+        _ntp_event.set()
+    return connected
+
+
+def _set_net_state_row():
+    state = WiFi.getNetState()
+    if state == WiFi.NET_UP:
+        DisplayI2C.set_row(1, "Connected")
+    elif state == WiFi.NET_DEGRADED:
+        DisplayI2C.set_row(1, "Degraded")
+    elif state == WiFi.NET_DOWN:
+        DisplayI2C.set_row(1, "Disconnected")
+    else:
+        DisplayI2C.set_row(1, "Checking...")
+
 
-    for i, runway_heading in enumerate(runway_headings):
-        # Convert to a signed angle in range -180..180 so cos/sin give correct signs.
-        diff = (wind_dir - runway_heading) % 360
-        if diff > 180:
-            diff -= 360
-
-        # Convert to radians for trig functions
-        rad = diff * math.pi / 180.0
-
-        # Components: positive headwind component means wind blowing from ahead (good).
-        headwind_comp = wind_speed * math.cos(rad)
-        crosswind_comp = abs(wind_speed * math.sin(rad))
-
-        # Color rules:
-        # - Green: wind <= 3 kts OR headwind component > 0 kts
-        # - Yellow: crosswind component > 10 kts
-        # - Red: tailwind component > 0
-        # - Color = (Green, Red, Blue)
-        if wind_speed <= 3:
-            color = (255*LED_BRIGHTNESS // 100, 0, 0)
+def _set_poll_time_row():
+    # Zulu / UTC time (after WiFi NTP sync)
+    t = utime.gmtime()
+    print("{:02d}:{:02d}Z".format(t[3], t[4]))
+    DisplayI2C.set_row(4, "{:02d}:{:02d}Z".format(t[3], t[4]))
+
+
+def _apply_metar(metar_data, stale=False):
+    DisplayI2C.set_row(0, "WiFi Status")
+    if stale:
+        DisplayI2C.set_row(1, "Connecting...")
+    else:
+        _set_net_state_row()
+
+    if metar_data and isinstance(metar_data, list):
+        metar = metar_data[0]
+        wind_speed = metar.get('wspd')
+        wind_dir = metar.get('wdir')
+        temp = metar.get('temp')
+        flight_cat = metar.get('fltCat')
+        obstime_time = metar.get('obsTime')
+
+        print("Wind:", wind_dir, "degrees @", wind_speed, "kt")
+        print("Temperature:", temp, "°C")
+        print("Flight Category:", flight_cat)
+        print("METAR Time:", obstime_time)
+
+        _request_leds(("wind", wind_dir, wind_speed))
+
+        if stale:
+            # Saved before the last reboot; the clock isn't synced yet, so
+            # there is no meaningful poll time to show.
+            DisplayI2C.set_row(3, "Saved METAR")
+            DisplayI2C.set_row(4, "STALE")
+        else:
+            DisplayI2C.set_row(3, "Last Poll Time")
+            _set_poll_time_row()
+
+        DisplayI2C.set_row(6, "Metar Observed")
+
+        obsTimeFormatted = format_unix_utc(obstime_time)
+        print("Formatted obsTime:", obsTimeFormatted)
+        DisplayI2C.set_row(7, obsTimeFormatted)
+    else:
+        print("Unexpected or no METAR format")
+        wifiNoConnectReason = wifiStatus.get("reason") if isinstance(wifiStatus, dict) else None
+        print("WiFi No Connect Reason:", wifiNoConnectReason)
+
+        DisplayI2C.set_row(3, "Failiure Reason")
+        if wifiNoConnectReason == "no_ssid_found":
+            DisplayI2C.set_row(4, "AP Not Found")
+        elif wifiNoConnectReason == "password_incorrect":
+            DisplayI2C.set_row(4, "Bad Password")
+        else:
+            DisplayI2C.set_row(4, "Connection ERR")
+
+        DisplayI2C.set_row(6, "Metar Observed")
+        DisplayI2C.set_row(7, "No METAR Data")
+        _request_leds(("fill", (0, 0, 10)))
+
+    _request_display()
+
+
+async def _wait_for_next_poll(cycle_start_ms, delay_s):
+    # Sleep until delay_s (measured from the start of the last cycle) has
+    # elapsed, or return early when a sync is requested.
+    due_ms = utime.ticks_add(cycle_start_ms, delay_s * 1000)
+    remaining_ms = utime.ticks_diff(due_ms, utime.ticks_ms())
+    if remaining_ms > 0:
+        try:
+            await asyncio.wait_for(_sync_event.wait(), remaining_ms / 1000)
+        except asyncio.TimeoutError:
+            pass
+    _sync_event.clear()
+    ButtonPy.consumeSyncPressed()
+
+
+async def fetch_task():
+    global metar_data, _applied_metar, _stale_metar
+    while True:
+        cycle_start_ms = utime.ticks_ms()
+
+        # Always define this so we don't NameError when fetch doesn't happen.
+        metar_data = None
+
+        await _ensure_wifi()
+
+        # No probe here: health comes from how the METAR requests go, and
+        # checkConnectivity() only probes after repeated failures.
+        internet_ok = WiFi.checkConnectivity()
+        print("Connectivity:", WiFi.getNetState())
+
+        if internet_ok:
+            # Expired DNS entries are looked up here, before the request
+            # opens, so the fetch itself connects from the cache and no
+            # lookup ever runs while a request is in flight.
+            httpclient.refresh_dns()
+            try:
+                metar_data = await WiFi.get_metar_async()
+            except Exception as e:
+                print("METAR fetch failed:", e)
+                metar_data = None
+            print('METAR data:', metar_data)
+
+        # A freshly updated build has booted, connected and gone through a
+        # fetch cycle without crashing: keep it. Whether the fetch worked
+        # depends on the network, not on the build.
+        UpdateJournal.confirmBoot()
+
+        if metar_data and isinstance(metar_data, list):
+            MetarSnapshot.saveSnapshot(metar_data)
+            is_new = MetarSchedule.recordFetch(metar_data)
+            print("New observation:", is_new)
+        else:
+            MetarSchedule.recordFetch(None)
+
+        if metar_data and _applied_metar is not None and (
+            WiFi.metarFetchInfo["unchanged"] or metar_data == _applied_metar
+        ):
+            # Same observation as on the board: only the poll time moves.
+            print("METAR unchanged; skipping LED/display update")
+            _set_net_state_row()
+            _set_poll_time_row()
+            _request_display()
         else:
-            color = (0, 0, 255*LED_BRIGHTNESS // 100)
+            _apply_metar(metar_data)
+            _applied_metar = metar_data if metar_data and isinstance(metar_data, list) else None
+        _stale_metar = None
+
+        # Poll from the start of this cycle (the scheduler's delay), so a
+        # slow fetch doesn't push every later poll back.
+        delay_s = MetarSchedule.nextPollDelay()
+        print("Next METAR poll in", delay_s, "s")
+        await _wait_for_next_poll(cycle_start_ms, delay_s)
+
+
+async def display_task():
+    while True:
+        await _display_event.wait()
+        _display_event.clear()
+        DisplayI2C.displayRefresh()
 
-            # Headwind
-            if headwind_comp > 0:
-                color = (255*LED_BRIGHTNESS // 100, 0, 0)
 
-                # Significant crosswind
-                if crosswind_comp > CROSSWIND_THRESHOLD_KTS:
-                    color = (255*LED_BRIGHTNESS // 100, 255*LED_BRIGHTNESS // 100, 0)
+async def led_task():
+    while True:
+        await _led_event.wait()
+        _led_event.clear()
+        request = _led_request
+        if request is None:
+            continue
+        if request[0] == "wind":
+            try:
+                leds_set_colors(request[1], request[2])
+            except Exception as e:
+                print("LED update failed:", e)
+        else:
+            LED.fill(request[1])
+            LED.flush()
+
 
-            # Tailwind
+def _diag_row(label, phase):
+    s = nettiming.phase_stats(phase)
+    if s is None:
+        return "{:<5}-".format(label)
+    return "{:<5}{}/{}".format(label, int(s["avg"]), int(s["p95"]))
+
+
+async def _show_net_diagnostics():
+    # Network phase timings (avg/p95 ms) on the OLED for a while, then put
+    # back whatever was there unless a fetch has redrawn it in the meantime.
+    saved = [DisplayI2C.get_row(i) for i in range(DisplayI2C.DISPLAY_ROWS)]
+    conns = nettiming.stats()["connections"]
+    page = {
+        0: "Net ms avg/p95",
+        1: _diag_row("DNS", "dns"),
+        2: _diag_row("Conn", "connect"),
+        3: _diag_row("TLS", "tls"),
+        4: _diag_row("TTFB", "ttfb"),
+        5: _diag_row("Xfer", "transfer"),
+        6: _diag_row("Tot", "total"),
+        7: "Reuse {}/{}".format(conns["reused"], conns["reused"] + conns["new"]),
+    }
+    DisplayI2C.set_rows(page)
+    _request_display()
+    nettiming.report()
+
+    await asyncio.sleep(NET_DIAG_SHOW_S)
+
+    if all(DisplayI2C.get_row(i) == text for i, text in page.items()):
+        DisplayI2C.set_rows(dict(enumerate(saved)))
+        _request_display()
+
+
+async def button_task():
+    # Woken straight from the button IRQ via the event queue; no polling.
+    sync_long = False
+    while True:
+        button, kind, at_ms = await ButtonPy.waitEvent()
+        print(ButtonPy.BUTTON_NAMES[button], "button", ButtonPy.EVENT_NAMES[kind], "at", at_ms)
+
+        if button == ButtonPy.BUTTON_SYNC:
+            # Short press: fetch now. Long press: network diagnostics page,
+            # shown as soon as the hold passes the threshold. Sync waits for
+            # the release, which a long press turns into a no-op.
+            if kind == ButtonPy.EVENT_PRESS:
+                sync_long = False
+            elif kind == ButtonPy.EVENT_LONG_PRESS:
+                sync_long = True
+                asyncio.create_task(_show_net_diagnostics())
+            elif kind == ButtonPy.EVENT_RELEASE and not sync_long:
+                _sync_event.set()
+
+        elif button == ButtonPy.BUTTON_AP and kind == ButtonPy.EVENT_PRESS:
+            LED.fill((0,10,10))
+            LED.flush()
+            print("AP Button Pressed - Starting AP Mode")
+            ButtonPy.consumeApPressed()
+            DisplayI2C.displayClear()
+            WiFi.startupAccessPointConfigPortal()
+            DisplayI2C.displayClear()
+            machine.reset()
+
+
+async def connectivity_task():
+    # Notice a dropped link between polls, reconnect, and fetch right away.
+    while True:
+        await asyncio.sleep_ms(CONNECTIVITY_CHECK_MS)
+
+        # Don't hold TLS buffers for a keep-alive connection the server has
+        # long since dropped.
+        httpclient.close_idle()
+
+        if WiFi.wlan is not None and WiFi.wlan.isconnected():
+            continue
+        if _wifi_lock.locked():
+            continue
+        if await _ensure_wifi():
+            _sync_event.set()
+
+
+async def ntp_task():
+    # Set the clock in the background so a slow or unreachable NTP server
+    # never holds up a METAR fetch; failures back off under WiFi.NTP_BACKOFF.
+    failures = 0
+    while True:
+        delay_s = NTP_CHECK_S
+        if (not WiFi.timeSynced() and WiFi.wlan is not None and WiFi.wlan.isconnected()
+                and WiFi.getNetState() != WiFi.NET_DOWN):
+            if await WiFi.sync_time_ntp_async():
+                failures = 0
             else:
-                color = (0, 255*LED_BRIGHTNESS // 100, 0)
-        LED.ledObject[i] = color
+                failures += 1
+                delay_s = WiFi.NTP_BACKOFF.backoff_ms(failures) // 1000
+        try:
+            await asyncio.wait_for(_ntp_event.wait(), delay_s)
+        except asyncio.TimeoutError:
+            pass
+        _ntp_event.clear()
 
-    LED.ledObject.write()
 
-def format_unix_utc(ts):
-    # ts is seconds since 1970-01-01 (integer)
-    tm = utime.gmtime(ts)            # returns (Y,M,D,H,M,S,weekday,yday)
-    return "{:04d}-{:02d}-{:02d} {:02d}:{:02d}Z".format(tm[0], tm[1], tm[2], tm[3], tm[4])
+async def _main():
+    global _sync_event, _display_event, _led_event, _wifi_lock, _ntp_event
 
+    _sync_event = asyncio.Event()
+    _display_event = asyncio.Event()
+    _led_event = asyncio.Event()
+    _ntp_event = asyncio.Event()
+    _wifi_lock = asyncio.Lock()
 
-print("Starting Ground Board BA...")
+    asyncio.create_task(display_task())
+    asyncio.create_task(led_task())
+    asyncio.create_task(button_task())
+    asyncio.create_task(connectivity_task())
+    asyncio.create_task(ntp_task())
+    await fetch_task()
 
-#-----Initialization-----
-LED_BRIGHTNESS = supportjson.readFromJSON("LED_BRIGHTNESS")
-if LED_BRIGHTNESS is None:
-    LED_BRIGHTNESS = 100
-print("LED_BRIGHTNESS set to", LED_BRIGHTNESS)
 
-CROSSWIND_THRESHOLD_KTS = supportjson.readFromJSON("CROSSWIND_THRESHOLD_KTS")
-if CROSSWIND_THRESHOLD_KTS is None:
-    CROSSWIND_THRESHOLD_KTS = 10
-print("CROSSWIND_THRESHOLD_KTS set to", CROSSWIND_THRESHOLD_KTS)
+print("Starting Ground Board BA...")
 
+#-----Initialization-----
 #Display Initialization
 DisplayI2C.startupDisplay()
 
-DisplayI2C.display_row0 = "Binary Aviation"
-DisplayI2C.display_row1 = "METAR Board"
-DisplayI2C.display_row3 = "Display"
-DisplayI2C.display_row4 = "Initialized"
+DisplayI2C.set_rows({
+    0: "Binary Aviation",
+    1: "METAR Board",
+    3: "Display",
+    4: "Initialized",
+})
 DisplayI2C.displayRefresh()
 
 #LED Initialization
-DisplayI2C.display_row6 = "LEDs"
-DisplayI2C.display_row7 = "Initializing"
+DisplayI2C.set_row(6, "LEDs")
+DisplayI2C.set_row(7, "Initializing")
 DisplayI2C.displayRefresh()
 
 LED.startupLED()
 
-DisplayI2C.display_row7 = "Initialized"
+DisplayI2C.set_row(7, "Initialized")
 DisplayI2C.displayRefresh()
 
 if supportjson.readFromJSON("UPDATE_MODE"):
     DisplayI2C.displayClear()
     print("Update Mode Enabled - Starting updater")
-    DisplayI2C.display_row0 = "Update Mode"
-    DisplayI2C.display_row1 = "Starting Update"
+    DisplayI2C.set_row(0, "Update Mode")
+    DisplayI2C.set_row(1, "Starting Update")
 
-    DisplayI2C.display_row3 = "Please Do Not"
-    DisplayI2C.display_row4 = "Turn Off Power"
+    DisplayI2C.set_row(3, "Please Do Not")
+    DisplayI2C.set_row(4, "Turn Off Power")
     DisplayI2C.displayRefresh()
     sleep(5)
     DisplayI2C.displayClear()
@@ -208,10 +505,10 @@ if supportjson.readFromJSON("UPDATE_MODE"):
     if ok:
         supportjson.writeToJSON("UPDATE_MODE", False)
         DisplayI2C.displayClear()
-        DisplayI2C.display_row0 = "Update Mode"
-        DisplayI2C.display_row1 = "Success"
-        DisplayI2C.display_row3 = "Unit"
-        DisplayI2C.display_row4 = "Restarting"
+        DisplayI2C.set_row(0, "Update Mode")
+        DisplayI2C.set_row(1, "Success")
+        DisplayI2C.set_row(3, "Unit")
+        DisplayI2C.set_row(4, "Restarting")
         DisplayI2C.displayRefresh()
         sleep(5)
         machine.reset()
@@ -220,119 +517,46 @@ if supportjson.readFromJSON("UPDATE_MODE"):
         DisplayI2C.displayClear()
         print("Update failed:", info)
         _display_update_failure(info)
-        DisplayI2C.display_row0 = "Update Mode"
-        DisplayI2C.display_row1 = "Failed"
-        DisplayI2C.display_row3 = "Turn Unit"
-        DisplayI2C.display_row4 = "Off/On"
-        DisplayI2C.display_row5 = "Error:"
+        DisplayI2C.set_row(0, "Update Mode")
+        DisplayI2C.set_row(1, "Failed")
+        DisplayI2C.set_row(3, "Turn Unit")
+        DisplayI2C.set_row(4, "Off/On")
+        DisplayI2C.set_row(5, "Error:")
         DisplayI2C.displayRefresh()
         while True:
             sleep(5)
 
 
 ButtonPy.startupButtons()
-WiFi.startupMetar()
-WiFi.resetWifi()
-
-sleep(3)
-
-DisplayI2C.displayClear()
-#WiFi.startupWifi()
-#print(WiFi.get_metar_raw())
-while True:
-
-    # Always define this so we don't NameError when fetch doesn't happen.
-    metar_data = None
-
-    if not WiFi.wlan.isconnected():
-        DisplayI2C.displayClear()
-        wifiStatus = WiFi.startupWifi()
-        sleep(5)
-        DisplayI2C.displayClear()
-
-    print("Checking internet connectivity...")
-    if WiFi.wlan.isconnected():
-        print("WiFi connected!")
-        internet_ok = WiFi._internet_check_google()
-    else:
-        print("WiFi not connected!")
-        internet_ok = False
-
-    print("Internet connectivity:", internet_ok)
-    DisplayI2C.display_row0= "WiFi Status"
-
-    if internet_ok:
-        DisplayI2C.display_row1 = "Connected"
-        try:
-            metar_data = WiFi.get_metar_raw()
-        except Exception as e:
-            print("METAR fetch failed:", e)
-            metar_data = None
-        print('METAR data:', metar_data)
-    else:
-        DisplayI2C.display_row1 = "Disconnected"
-    #DisplayI2C.displayRefresh()
-
-    if metar_data and isinstance(metar_data, list):
-        metar = metar_data[0]
-        wind_speed = metar.get('wspd')
-        wind_dir = metar.get('wdir')
-        temp = metar.get('temp')
-        flight_cat = metar.get('fltCat')
-        obstime_time = metar.get('obsTime')
-
-        print("Wind:", wind_dir, "degrees @", wind_speed, "kt")
-        print("Temperature:", temp, "°C")
-        print("Flight Category:", flight_cat)
-        print("METAR Time:", obstime_time)
-
-        leds_set_colors(wind_dir, wind_speed)
-
-        DisplayI2C.display_row3 = "Last Poll Time"
-        DisplayI2C.display_row6 = "Metar Observed"
-        
-        # Zulu / UTC time (after WiFi NTP sync)
-        t = utime.gmtime()
-        print("{:02d}:{:02d}Z".format(t[3], t[4]))
-        DisplayI2C.display_row4 = "{:02d}:{:02d}Z".format(t[3], t[4])
-
-        obsTimeFormatted = format_unix_utc(obstime_time)
-        print("Formatted obsTime:", obsTimeFormatted)
-        DisplayI2C.display_row7 = obsTimeFormatted
-    else:
-        print("Unexpected or no METAR format")
-        wifiNoConnectReason = wifiStatus["reason"]
-        print("WiFi No Connect Reason:", wifiNoConnectReason)
-
-        DisplayI2C.display_row3 = "Failiure Reason"
-        if wifiNoConnectReason == "no_ssid_found":
-            DisplayI2C.display_row4 = "AP Not Found"
-        elif wifiNoConnectReason == "password_incorrect":
-            DisplayI2C.display_row4 = "Bad Password"
-        else:
-            DisplayI2C.display_row4 = "Connection ERR"
-
-        DisplayI2C.display_row6 = "Metar Observed"
-        DisplayI2C.display_row7 = "No METAR Data"
-        LED.ledObject.fill((0,0,10))
-        LED.ledObject.write()
 
+# Show the last good METAR straight away (marked stale) while WiFi, NTP and
+# the first live fetch are still in progress.
+snapshot = MetarSnapshot.loadSnapshot()
+if snapshot is not None:
+    print("Showing saved METAR snapshot:", snapshot)
+    _stale_metar = snapshot
+    DisplayI2C.displayClear()
+    _apply_metar(snapshot, stale=True)
+    leds_set_colors(snapshot[0].get('wdir'), snapshot[0].get('wspd'))
     DisplayI2C.displayRefresh()
 
-    while (ButtonPy.syncButtonPressed == False and time_since_last_metar < 600):
-        utime.sleep(1)
-        time_since_last_metar += 1
-        print ("Time since last metar:", time_since_last_metar)
+WiFi.startupMetar()
+WiFi.resetWifi()
 
-        if(ButtonPy.apButtonPressed == True):
-            LED.ledObject.fill((0,10,10))
-            LED.ledObject.write()
-            print("AP Button Pressed - Starting AP Mode")
-            ButtonPy.consumeApPressed()
-            DisplayI2C.displayClear()
-            WiFi.startupAccessPointConfigPortal()
-            DisplayI2C.displayClear()
-            machine.reset()
+if snapshot is None:
+    sleep(3)
+    DisplayI2C.displayClear()
 
-    time_since_last_metar = 0
-    ButtonPy.consumeSyncPressed()
\ No newline at end of file
+MetarSchedule.startupSchedule()
+WiFi.startupHealth()
+
+try:
+    asyncio.run(_main())
+except Exception as e:
+    # An update still on trial that crashes goes straight back to the
+    # previous files instead of waiting for the trial timer.
+    if UpdateJournal.inTrial():
+        print("Crashed during update trial:", e)
+        UpdateJournal.rollback()
+        machine.reset()
+    raise
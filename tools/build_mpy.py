@@ -0,0 +1,123 @@
+"""Cross-compile the project into .mpy files for the updater.
+
+Run on the host from the repo root (needs mpy-cross matching the board's
+MicroPython version, e.g. "pip install mpy-cross==1.22.2"):
+
+    python tools/build_mpy.py [--out dist/mpy] [--mpy-cross PATH] [--bundle [zlib|none]]
+
+Every .py in update_manifest.json is compiled to .mpy under the output
+directory, except the files MicroPython only runs as source (main.py,
+boot.py); those and any non-.py files are copied as they are. The output
+gets its own manifests (and bundle), so pointing a board's
+GITHUB_SUBDIR (or UPDATE_BASE_PATH) at it makes run_update install the
+.mpy build; the matching .py files on the board are removed when it is
+activated, since MicroPython imports a .py in preference to a .mpy.
+
+The manifest records the .mpy format version, and the updater refuses a
+build its firmware can't import.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import make_manifest  # noqa: E402
+
+DEFAULT_OUT = "dist/mpy"
+
+# MicroPython runs these by file name, so they have to stay source.
+SOURCE_ONLY = ("main.py", "boot.py")
+
+
+def _mpy_cross_command(explicit):
+    if explicit:
+        return [explicit]
+    found = shutil.which("mpy-cross")
+    if found:
+        return [found]
+    return [sys.executable, "-m", "mpy_cross"]
+
+
+def _mpy_header(path):
+    # Byte 1 is the .mpy version, the low bits of byte 2 its sub-version
+    # (only set when the file contains native code).
+    with open(path, "rb") as f:
+        head = f.read(4)
+    if len(head) < 4 or head[0:1] != b"M":
+        raise SystemExit("{} is not an .mpy file".format(path))
+    return {"version": head[1], "sub": head[2] & 3}
+
+
+def build(out_dir, mpy_cross, compression, cross_args):
+    paths, _ = make_manifest._read_manifest()
+    if not paths:
+        print("no files in", make_manifest.MANIFEST)
+        return 1
+
+    if os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+
+    out_paths = []
+    header = None
+    for path in paths:
+        if path.endswith(".py") and path not in SOURCE_ONLY:
+            out_path = path[:-3] + ".mpy"
+            dest = os.path.join(out_dir, out_path)
+            os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+            # -s keeps the .py name in tracebacks.
+            cmd = mpy_cross + list(cross_args) + ["-s", path, "-o", dest, path]
+            subprocess.run(cmd, check=True)
+            found = _mpy_header(dest)
+            if header is None or found["sub"] > header["sub"]:
+                header = found
+        else:
+            out_path = path
+            dest = os.path.join(out_dir, out_path)
+            os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+            with open(dest, "wb") as f:
+                f.write(make_manifest._served_bytes(path))
+        out_paths.append(out_path)
+
+    extra = {"mpy": header} if header else None
+    cwd = os.getcwd()
+    os.chdir(out_dir)
+    try:
+        make_manifest.write_manifest(out_paths, compression, extra)
+    finally:
+        os.chdir(cwd)
+    return 0
+
+
+def main(argv):
+    out_dir = DEFAULT_OUT
+    explicit = None
+    compression = None
+    cross_args = []
+
+    args = argv[1:]
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--out" and i + 1 < len(args):
+            out_dir = args[i + 1]
+            i += 1
+        elif arg == "--mpy-cross" and i + 1 < len(args):
+            explicit = args[i + 1]
+            i += 1
+        elif arg == "--bundle":
+            compression = "zlib"
+            if i + 1 < len(args) and args[i + 1] in ("zlib", "none"):
+                compression = args[i + 1]
+                i += 1
+        else:
+            # Anything else goes to mpy-cross (e.g. -O2, -march=armv6m).
+            cross_args.append(arg)
+        i += 1
+
+    return build(out_dir, _mpy_cross_command(explicit), compression, cross_args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,172 @@
+"""Regenerate the update manifests.
+
+update_manifest.json stays a plain list of paths: boards still running an
+older updater read it and can't handle anything else. update_manifest_v2.json
+lists the same files with a size and SHA-256 each, and is what the current
+updater prefers.
+
+Run on the host from the repo root before pushing a release:
+
+    python tools/make_manifest.py [--bundle [zlib|none]] [--no-bundle] [extra paths...]
+
+The file list (and its order) comes from update_manifest.json; pass extra
+paths on the command line to add them. The updater on the board compares
+these against its local files and only downloads the ones that differ,
+and checks each download against them before replacing anything.
+
+--bundle also writes every listed file into one ustar archive
+(update_bundle.tar, or update_bundle.tar.zlib compressed with a 1 KiB
+window) and names it in the v2 manifest, so the board can fetch a whole
+update over a single connection. Once the v2 manifest has a bundle it is
+rebuilt on every run until --no-bundle; commit the bundle together with the
+manifests.
+
+Hashes are taken over the content GitHub serves: .gitattributes normalizes
+text files to LF, so CRLF checkouts (Windows) are hashed as LF.
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+import tarfile
+import zlib
+
+MANIFEST = "update_manifest.json"
+MANIFEST_V2 = "update_manifest_v2.json"
+BUNDLE_BASENAME = "update_bundle.tar"
+
+# Must match utils/tarstream.py ZLIB_WBITS.
+ZLIB_WBITS = 10
+
+
+def _load_json(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _read_manifest(manifest_path=MANIFEST, manifest_v2_path=MANIFEST_V2):
+    """Paths from the legacy manifest, and the bundle named in the v2 one."""
+    data = _load_json(manifest_path) or []
+    if isinstance(data, dict):
+        data = data.get("files", [])
+    paths = []
+    for item in data:
+        path = item.get("path") if isinstance(item, dict) else item
+        if path:
+            paths.append(str(path).lstrip("/"))
+
+    bundle = None
+    v2 = _load_json(manifest_v2_path)
+    if isinstance(v2, dict):
+        bundle = v2.get("bundle")
+    return paths, bundle
+
+
+def _write_json(path, data):
+    with open(path, "w", newline="\n") as f:
+        f.write(json.dumps(data, indent=2) + "\n")
+
+
+def _served_bytes(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if b"\0" not in data:
+        data = data.replace(b"\r\n", b"\n")
+    return data
+
+
+def build_manifest(paths):
+    entries = []
+    for path in paths:
+        data = _served_bytes(path)
+        entries.append({
+            "path": path,
+            "size": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        })
+    return entries
+
+
+def build_bundle(paths, compression):
+    # Reproducible archive: fixed owner, mode and mtime, manifest order.
+    raw = io.BytesIO()
+    with tarfile.open(fileobj=raw, mode="w", format=tarfile.USTAR_FORMAT) as tar:
+        for path in paths:
+            data = _served_bytes(path)
+            info = tarfile.TarInfo(path)
+            info.size = len(data)
+            info.mode = 0o644
+            info.mtime = 0
+            tar.addfile(info, io.BytesIO(data))
+    data = raw.getvalue()
+
+    name = BUNDLE_BASENAME
+    if compression == "zlib":
+        packer = zlib.compressobj(9, zlib.DEFLATED, ZLIB_WBITS)
+        data = packer.compress(data) + packer.flush()
+        name += ".zlib"
+
+    with open(name, "wb") as f:
+        f.write(data)
+    return {
+        "path": name,
+        "size": len(data),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "compression": compression,
+    }
+
+
+def write_manifest(paths, compression=None, extra=None):
+    """Write both manifests (and the bundle, if compression is set) in the cwd."""
+    manifest = dict(extra or {})
+    if compression:
+        manifest["bundle"] = build_bundle(paths, compression)
+        print("wrote", manifest["bundle"]["path"], manifest["bundle"]["size"], "bytes")
+    manifest["files"] = build_manifest(paths)
+
+    _write_json(MANIFEST, list(paths))
+    _write_json(MANIFEST_V2, manifest)
+    print("wrote", MANIFEST, "and", MANIFEST_V2, "with", len(paths), "files")
+
+
+def main(argv):
+    paths, bundle = _read_manifest()
+    compression = bundle.get("compression", "none") if isinstance(bundle, dict) else None
+
+    args = argv[1:]
+    extras = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--bundle":
+            compression = "zlib"
+            if i + 1 < len(args) and args[i + 1] in ("zlib", "none"):
+                compression = args[i + 1]
+                i += 1
+        elif arg == "--no-bundle":
+            compression = None
+        else:
+            extras.append(arg)
+        i += 1
+
+    for extra in extras:
+        extra = extra.replace(os.sep, "/").lstrip("/")
+        if extra not in paths:
+            paths.append(extra)
+
+    missing = [p for p in paths if not os.path.isfile(p)]
+    if missing:
+        print("missing files:", ", ".join(missing))
+        return 1
+
+    write_manifest(paths, compression)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -1,7 +1,5 @@
 
 import gc
-import ssl
-import socket
 
 try:
 	import uos as os
@@ -18,12 +16,37 @@ try:
 except Exception:
 	import time
 
+try:
+	import uhashlib as hashlib
+except Exception:
+	import hashlib
+
+try:
+	import ubinascii as binascii
+except Exception:
+	import binascii
+
 import utils.jsonsupport as supportjson
+import utils.httpclient as httpclient
+import utils.retry as retry
+import utils.nettiming as nettiming
+import utils.updatejournal as UpdateJournal
+import utils.tarstream as tarstream
 
 
 RAW_HOST = "raw.githubusercontent.com"
 API_HOST = "api.github.com"
 
+# Retry/backoff for the manifest/API requests and for each file download.
+# The deadline bounds one operation including all of its attempts.
+FETCH_RETRY = retry.RetryPolicy("update fetch", attempts=3, base_ms=500, max_ms=4000, deadline_ms=60000)
+DOWNLOAD_RETRY = retry.RetryPolicy("update download", attempts=3, base_ms=500, max_ms=4000, deadline_ms=90000)
+BUNDLE_RETRY = retry.RetryPolicy("update bundle", attempts=2, base_ms=1000, max_ms=4000, deadline_ms=180000)
+
+# Use the release bundle (one request) instead of per-file downloads once at
+# least this many files changed.
+UPDATE_BUNDLE_MIN_FILES = 2
+
 # Default repo for updates (used if config.json doesn't provide GITHUB_REPO)
 DEFAULT_GITHUB_REPO = "AwsomeStar123456/GroundBoardBA"
 
@@ -32,31 +55,26 @@ DEFAULT_GITHUB_REPO = "AwsomeStar123456/GroundBoardBA"
 DEFAULT_FALLBACK_FILES = [
 	"main.py",
 	"updates.py",
+	"boot.py",
 	"lib/__init__.py",
 	"lib/ssd1306.py",
 	"utils/__init__.py",
 	"utils/buttons.py",
+	"utils/httpclient.py",
 	"utils/i2cdisplay.py",
 	"utils/jsonsupport.py",
 	"utils/led.py",
+	"utils/metarschedule.py",
+	"utils/metarsnapshot.py",
+	"utils/metarstream.py",
+	"utils/nettiming.py",
+	"utils/retry.py",
+	"utils/tarstream.py",
+	"utils/updatejournal.py",
 	"utils/wifi.py",
 ]
 
 
-def _sleep_ms(ms):
-	try:
-		time.sleep_ms(ms)
-	except Exception:
-		time.sleep(ms / 1000.0)
-
-
-def _wrap_tls(sock, host):
-	try:
-		return ssl.wrap_socket(sock, server_hostname=host)
-	except Exception:
-		return ssl.wrap_socket(sock)
-
-
 def _ensure_dirs_for_file(path):
 	if not path or "/" not in path:
 		return
@@ -72,104 +90,23 @@ def _ensure_dirs_for_file(path):
 			pass
 
 
-def _read_headers(sock, max_bytes=4096):
-	data = b""
-	while len(data) < max_bytes and b"\r\n\r\n" not in data:
-		chunk = sock.read(256) if hasattr(sock, "read") else sock.recv(256)
-		if not chunk:
-			break
-		data += chunk
-	if b"\r\n\r\n" not in data:
-		return None, None
-	header, rest = data.split(b"\r\n\r\n", 1)
-	return header, rest
-
+def _http_get_to_bytes(host, path, timeout_s=12, extra_headers=None, max_bytes=200000, port=443, tls=True):
+	def _attempt(deadline):
+		code, body = httpclient.get_to_bytes(
+			host, path, max_bytes=max_bytes, headers=extra_headers, timeout_s=deadline.timeout_s(timeout_s),
+			port=port, tls=tls,
+		)
+		if code is not None and (code >= 500 or code == 429):
+			raise retry.RetryableError("HTTP {}".format(code))
+		return code, body
 
-def _parse_status_code(header_bytes):
 	try:
-		first = header_bytes.split(b"\r\n", 1)[0]
-		return int(first.split(b" ")[1])
-	except Exception:
-		return None
-
-
-def _http_get_stream(host, path, port=443, timeout_s=12, extra_headers=None):
-	addr = socket.getaddrinfo(host, port)[0][-1]
-	s = socket.socket()
-	try:
-		try:
-			s.settimeout(timeout_s)
-		except Exception:
-			pass
-		s.connect(addr)
-		ss = _wrap_tls(s, host)
-		try:
-			st = getattr(ss, "settimeout", None)
-			if st:
-				st(timeout_s)
-		except Exception:
-			pass
-
-		headers = ""
-		if extra_headers:
-			for k, v in extra_headers.items():
-				headers += "{}: {}\r\n".format(k, v)
-
-		# Use HTTP/1.0 to avoid chunked encoding.
-		req = (
-			"GET {} HTTP/1.0\r\n"
-			"Host: {}\r\n"
-			"User-Agent: GroundBoardBA\r\n"
-			"Accept: */*\r\n"
-			"Accept-Encoding: identity\r\n"
-			"Connection: close\r\n"
-			"{}"
-			"\r\n"
-		).format(path, host, headers)
-
-		try:
-			ss.write(req.encode("utf-8"))
-		except Exception:
-			ss.send(req.encode("utf-8"))
-
-		return ss, s
-	except Exception:
-		try:
-			s.close()
-		except Exception:
-			pass
+		return FETCH_RETRY.call(_attempt)
+	except MemoryError:
 		raise
-
-
-def _http_get_to_bytes(host, path, timeout_s=12, extra_headers=None, max_bytes=200000):
-	ss = None
-	s = None
-	try:
-		ss, s = _http_get_stream(host, path, timeout_s=timeout_s, extra_headers=extra_headers)
-		header, rest = _read_headers(ss)
-		if header is None:
-			return None, None
-		code = _parse_status_code(header)
-		chunks = []
-		size = 0
-		if rest:
-			chunks.append(rest)
-			size += len(rest)
-		while True:
-			chunk = ss.read(1024) if hasattr(ss, "read") else ss.recv(1024)
-			if not chunk:
-				break
-			chunks.append(chunk)
-			size += len(chunk)
-			if size > max_bytes:
-				raise MemoryError("HTTP body exceeded max_bytes")
-		return code, b"".join(chunks)
-	finally:
-		try:
-			if ss:
-				ss.close()
-		except Exception:
-			pass
+	except Exception as e:
+		print("HTTP GET failed:", host, path, e)
+		return None, None
 
 
 def _body_prefix(body, max_len=160):
@@ -192,70 +129,218 @@ def _body_prefix(body, max_len=160):
 			pass
 
 
-def _http_get_to_file(host, path, dest_path, timeout_s=20, extra_headers=None):
-	ss = None
-	s = None
-	tmp_path = dest_path + ".tmp"
+# ----- File hashes -----
+# Manifest entries may carry "size" and "sha256"; GitHub tree entries carry
+# "size" and the git blob "sha" (SHA-1 of b"blob <size>\0" + content). Either
+# lets us skip files that are already up to date and verify downloads.
+
+_HASH_CHUNK = 1024
+
+
+def _manifest_entry(item):
+	# Normalize a manifest / tree / fallback item to {"path", "size", "sha256", "git_sha"}.
+	if isinstance(item, dict):
+		path = item.get("path")
+		if not path:
+			return None
+		return {
+			"path": str(path).lstrip("/"),
+			"size": item.get("size"),
+			"sha256": item.get("sha256"),
+			"git_sha": item.get("git_sha"),
+		}
+	if item:
+		return {"path": str(item).lstrip("/"), "size": None, "sha256": None, "git_sha": None}
+	return None
+
+
+class _Hasher:
+	"""Hash the way a file entry says to check it (SHA-256 or git blob SHA-1)."""
+
+	def __init__(self, entry):
+		self.expected = None
+		self._h = None
+		if entry is None:
+			return
+		if entry.get("sha256"):
+			self.expected = str(entry["sha256"]).lower()
+			self._h = hashlib.sha256()
+		elif entry.get("git_sha") and entry.get("size") is not None:
+			self.expected = str(entry["git_sha"]).lower()
+			self._h = hashlib.sha1()
+			self._h.update("blob {}\x00".format(int(entry["size"])).encode())
+
+	def update(self, data):
+		if self._h is not None:
+			self._h.update(data)
+
+	def matches(self):
+		if self._h is None:
+			return True
+		return binascii.hexlify(self._h.digest()).decode() == self.expected
+
+
+def _file_size(path):
 	try:
-		_ensure_dirs_for_file(dest_path)
-		ss, s = _http_get_stream(host, path, timeout_s=timeout_s, extra_headers=extra_headers)
-
-		header, rest = _read_headers(ss)
-		if header is None:
-			return False, "no_headers"
-		code = _parse_status_code(header)
-		if code != 200:
-			return False, "http_{}".format(code)
-
-		with open(tmp_path, "wb") as f:
-			if rest:
-				f.write(rest)
+		return os.stat(path)[6]
+	except Exception:
+		return None
+
+
+def _entry_digest(entry):
+	# What a staged or partial copy is recorded against in the progress journal.
+	if entry is None:
+		return None
+	return entry.get("sha256") or entry.get("git_sha")
+
+
+def _hash_file(hasher, path):
+	buf = bytearray(_HASH_CHUNK)
+	mv = memoryview(buf)
+	with open(path, "rb") as f:
+		while True:
+			n = f.readinto(buf)
+			if not n:
+				break
+			hasher.update(mv[:n])
+
+
+def _local_file_matches(entry):
+	"""True if the local copy already has the entry's size and hash."""
+	hasher = _Hasher(entry)
+	if hasher.expected is None:
+		return False
+	size = entry.get("size")
+	if size is not None and _file_size(entry["path"]) != int(size):
+		return False
+	try:
+		_hash_file(hasher, entry["path"])
+	except Exception:
+		return False
+	return hasher.matches()
+
+
+def _remove_quietly(path):
+	try:
+		os.remove(path)
+	except Exception:
+		pass
+
+
+def _replace_verified(tmp_path, dest_path, written, hasher, entry):
+	# Check a finished .tmp download against its entry, then move it into place.
+	size = entry.get("size") if entry else None
+	if size is not None and written != int(size):
+		if written > int(size):
+			_remove_quietly(tmp_path)
+		raise retry.RetryableError("size_mismatch {} != {}".format(written, size))
+	if not hasher.matches():
+		_remove_quietly(tmp_path)
+		raise retry.RetryableError("hash_mismatch")
+
+	# Replace existing file atomically-ish.
+	_remove_quietly(dest_path)
+	try:
+		os.rename(tmp_path, dest_path)
+	except Exception:
+		# Fallback: copy then remove tmp
+		with open(tmp_path, "rb") as src, open(dest_path, "wb") as out:
 			while True:
-				chunk = ss.read(1024) if hasattr(ss, "read") else ss.recv(1024)
-				if not chunk:
+				buf = src.read(1024)
+				if not buf:
 					break
-				f.write(chunk)
+				out.write(buf)
+		_remove_quietly(tmp_path)
 
-		# Replace existing file atomically-ish.
-		try:
-			os.remove(dest_path)
-		except Exception:
-			pass
-		try:
-			os.rename(tmp_path, dest_path)
-		except Exception:
-			# Fallback: copy then remove tmp
-			with open(tmp_path, "rb") as src, open(dest_path, "wb") as out:
+
+def _http_get_to_file_once(
+	host, path, dest_path, timeout_s=20, extra_headers=None, entry=None, port=443, tls=True, resume=False
+):
+	# With resume, whatever is already in the .tmp is a prefix of this very
+	# entry (see _http_get_to_file), so only the rest is requested. The .tmp
+	# survives a failed attempt for the next one to pick up.
+	tmp_path = dest_path + ".tmp"
+	try:
+		_ensure_dirs_for_file(dest_path)
+
+		offset = (_file_size(tmp_path) or 0) if resume else 0
+		size = entry.get("size") if entry else None
+		if offset and size is not None and offset >= int(size):
+			# Everything arrived last time; just check it.
+			hasher = _Hasher(entry)
+			_hash_file(hasher, tmp_path)
+			_replace_verified(tmp_path, dest_path, offset, hasher, entry)
+			return True, None
+
+		headers = extra_headers
+		if offset:
+			headers = dict(extra_headers or {})
+			headers["Range"] = "bytes={}-".format(offset)
+			print("Resuming at", offset, "bytes:", dest_path)
+
+		# Requests share a pooled keep-alive connection per host.
+		with httpclient.get(host, path, headers=headers, timeout_s=timeout_s, port=port, tls=tls) as resp:
+			if resp.status >= 500 or resp.status == 429:
+				raise retry.RetryableError("http_{}".format(resp.status))
+			if resp.status == 416:
+				# The partial file doesn't fit the remote one; start over.
+				_remove_quietly(tmp_path)
+				raise retry.RetryableError("http_416")
+			if resp.status == 206 and offset:
+				if not resp.headers.get("content-range", "").startswith("bytes {}-".format(offset)):
+					_remove_quietly(tmp_path)
+					raise retry.RetryableError("bad_content_range")
+			elif resp.status == 200:
+				# Full body (the server may ignore Range).
+				offset = 0
+			else:
+				return False, "http_{}".format(resp.status)
+
+			# Body bytes go straight from the shared receive buffer to flash,
+			# hashed on the way so a bad download never replaces the file.
+			hasher = _Hasher(entry)
+			if offset:
+				_hash_file(hasher, tmp_path)
+			written = offset
+			with open(tmp_path, "ab" if offset else "wb") as f:
 				while True:
-					buf = src.read(1024)
-					if not buf:
+					view = resp.read_view()
+					if not view:
 						break
-					out.write(buf)
-			try:
-				os.remove(tmp_path)
-			except Exception:
-				pass
+					hasher.update(view)
+					f.write(view)
+					written += len(view)
 
+		_replace_verified(tmp_path, dest_path, written, hasher, entry)
 		return True, None
 
+	except Exception:
+		if not resume:
+			_remove_quietly(tmp_path)
+		raise
+
+
+def _http_get_to_file(host, path, dest_path, timeout_s=20, extra_headers=None, entry=None, port=443, tls=True):
+	# Downloads of entries with a known digest resume from whatever .tmp is
+	# already there: run_update has removed any that belong to other content
+	# and recorded the digest in the progress journal.
+	resume = _entry_digest(entry) is not None
+
+	# Each attempt's socket timeout is capped by what is left of the
+	# download's deadline, so one stuck file can't stall the update for long.
+	def _attempt(deadline):
+		return _http_get_to_file_once(
+			host, path, dest_path, timeout_s=deadline.timeout_s(timeout_s), extra_headers=extra_headers,
+			entry=entry, port=port, tls=tls, resume=resume,
+		)
+
+	try:
+		ok, err = DOWNLOAD_RETRY.call(_attempt)
+	except MemoryError:
+		raise
 	except Exception as e:
-		try:
-			os.remove(tmp_path)
-		except Exception:
-			pass
 		return False, str(e)
-
-	finally:
-		try:
-			if ss:
-				ss.close()
-		except Exception:
-			pass
-		try:
-			if s:
-				s.close()
-		except Exception:
-			pass
+	return ok, err
 
 
 def _normalize_subdir(subdir):
@@ -265,12 +350,6 @@ def _normalize_subdir(subdir):
 	return subdir
 
 
-def _join_repo_path(subdir, relpath):
-	subdir = _normalize_subdir(subdir)
-	relpath = str(relpath).lstrip("/")
-	return (subdir + "/" + relpath) if subdir else relpath
-
-
 def _repo_owner_and_name(repo):
 	if not repo:
 		return None, None
@@ -294,25 +373,149 @@ def _repo_owner_and_name(repo):
 	return owner, name
 
 
-def _get_manifest_file_list(repo, branch, subdir, manifest_path):
-	full_path = "/{}/{}/{}".format(repo, branch, _join_repo_path(subdir, manifest_path))
-	code, body = _http_get_to_bytes(RAW_HOST, full_path, timeout_s=15, max_bytes=60000)
+def _update_source(repo, branch, subdir):
+	# Where manifest/bundle/file downloads come from. Defaults to GitHub raw;
+	# UPDATE_HOST/PORT/TLS/BASE_PATH point it at another server, e.g. a local
+	# "python -m http.server" in a checkout for benchmarking.
+	host = supportjson.readFromJSON("UPDATE_HOST") or RAW_HOST
+	tls = supportjson.readFromJSON("UPDATE_TLS")
+	if tls is None:
+		tls = True
+	port = supportjson.readFromJSON("UPDATE_PORT") or (443 if tls else 80)
+	base = supportjson.readFromJSON("UPDATE_BASE_PATH")
+	if base is None:
+		base = "/{}/{}/{}".format(repo, branch, _normalize_subdir(subdir))
+	return {"host": host, "port": int(port), "tls": bool(tls), "base": "/" + str(base).strip("/")}
+
+
+def _source_path(src, relpath):
+	base = src["base"].rstrip("/")
+	return base + "/" + str(relpath).lstrip("/")
+
+
+def _get_manifest_file_list(src, manifest_path):
+	"""Return (files, bundle, mpy) from the manifest; bundle/mpy are None if absent."""
+	code, body = _http_get_to_bytes(
+		src["host"], _source_path(src, manifest_path), timeout_s=15, max_bytes=60000,
+		port=src["port"], tls=src["tls"],
+	)
 	if code != 200 or not body:
-		return None
+		return None, None, None
 	try:
 		obj = json.loads(body.decode("utf-8"))
 	except Exception:
 		obj = json.loads(body)
 
 	if isinstance(obj, list):
-		return obj
+		return obj, None, None
 	if isinstance(obj, dict):
 		files = obj.get("files")
+		bundle = obj.get("bundle")
+		if not isinstance(bundle, dict) or not bundle.get("path"):
+			bundle = None
+		mpy = obj.get("mpy")
+		if not isinstance(mpy, dict):
+			mpy = None
 		if isinstance(files, list):
-			return files
+			return files, bundle, mpy
+	return None, None, None
+
+
+# ----- Precompiled modules -----
+# tools/build_mpy.py publishes a build where modules are .mpy. MicroPython
+# imports a .py in preference to a .mpy of the same name, so installing one
+# form removes the other.
+
+def _mpy_compatible(mpy):
+	# sys.implementation._mpy: version in the low byte, sub-version in bits
+	# 8-9. Bytecode-only files record sub-version 0 and load on any firmware
+	# with the same version; only native code has to match it too.
+	try:
+		import sys
+		have = sys.implementation._mpy
+	except Exception:
+		return False
+	if (have & 0xFF) != mpy.get("version"):
+		return False
+	sub = mpy.get("sub") or 0
+	return sub == 0 or ((have >> 8) & 3) == sub
+
+
+def _module_twin(path):
+	if path.endswith(".mpy"):
+		return path[:-4] + ".py"
+	if path.endswith(".py"):
+		return path[:-3] + ".mpy"
 	return None
 
 
+def _stage_bundle_once(src, bundle, wanted, staged, timeout_s):
+	# One pass over the bundle: every wanted entry is written to its staged
+	# path and verified; everything else streams past.
+	path = _source_path(src, bundle["path"])
+	buf = bytearray(_HASH_CHUNK)
+	mv = memoryview(buf)
+	with httpclient.get(src["host"], path, timeout_s=timeout_s, port=src["port"], tls=src["tls"]) as resp:
+		if resp.status >= 500 or resp.status == 429:
+			raise retry.RetryableError("http_{}".format(resp.status))
+		if resp.status != 200:
+			raise OSError("bundle http_{}".format(resp.status))
+
+		tar = tarstream.TarReader(resp, bundle.get("compression"))
+		while True:
+			item = tar.next()
+			if item is None:
+				break
+			name = item[0]
+			entry = wanted.get(name)
+			if entry is None or name in staged:
+				continue
+
+			dest_path = UpdateJournal.stagePath(name)
+			tmp_path = dest_path + ".tmp"
+			_ensure_dirs_for_file(dest_path)
+			hasher = _Hasher(entry)
+			written = 0
+			try:
+				with open(tmp_path, "wb") as f:
+					while True:
+						n = tar.readinto(buf)
+						if not n:
+							break
+						hasher.update(mv[:n])
+						f.write(mv[:n])
+						written += n
+				_replace_verified(tmp_path, dest_path, written, hasher, entry)
+			except retry.RetryableError as e:
+				# A bad entry is left for the per-file fallback.
+				print("Bundle entry rejected:", name, e)
+				_remove_quietly(tmp_path)
+				continue
+			staged.add(name)
+			print("[bundle] staged:", name, written)
+			gc.collect()
+
+
+def _stage_bundle(src, bundle, entries, timeout_s=25):
+	"""Stage entries from the release bundle; returns the set of staged paths."""
+	wanted = {}
+	for entry in entries:
+		wanted[entry["path"]] = entry
+	staged = set()
+
+	def _attempt(deadline):
+		_stage_bundle_once(src, bundle, wanted, staged, deadline.timeout_s(timeout_s))
+
+	print("Update bundle:", bundle["path"], "compression=", bundle.get("compression") or "none")
+	try:
+		BUNDLE_RETRY.call(_attempt)
+	except MemoryError:
+		raise
+	except Exception as e:
+		print("Update bundle failed:", e)
+	return staged
+
+
 def _get_tree_file_list(repo_owner, repo_name, branch, subdir, allowed_exts):
 	# GitHub tree API (public repos): /repos/{owner}/{repo}/git/trees/{branch}?recursive=1
 	path = "/repos/{}/{}/git/trees/{}?recursive=1".format(repo_owner, repo_name, branch)
@@ -353,7 +556,7 @@ def _get_tree_file_list(repo_owner, repo_name, branch, subdir, allowed_exts):
 						break
 				if not ok:
 					continue
-			out.append(p_rel)
+			out.append({"path": p_rel, "size": item.get("size"), "git_sha": item.get("sha")})
 		except Exception:
 			pass
 
@@ -361,15 +564,46 @@ def _get_tree_file_list(repo_owner, repo_name, branch, subdir, allowed_exts):
 
 
 def run_update(connect_wifi=True):
-	"""Download latest project files from GitHub and replace local files.
+	"""Download latest project files from GitHub, stage them and activate them.
 
 	Config keys (config.json):
 	  - GITHUB_REPO: "owner/repo" (required)
 	  - GITHUB_BRANCH: "main" (optional, default "main")
 	  - GITHUB_SUBDIR: "MicroPython/GroundBoardBA" (optional)
 	  - UPDATE_MANIFEST_PATH: "update_manifest.json" (optional)
-	  - UPDATE_FILE_EXTENSIONS: [".py", ".json"] (optional)
+	  - UPDATE_MANIFEST_V2_PATH: "update_manifest_v2.json" (optional)
+	  - UPDATE_FILE_EXTENSIONS: [".py", ".mpy", ".json"] (optional)
 	  - UPDATE_PRESERVE_FILES: ["config.json"] (optional)
+	  - UPDATE_HOST / UPDATE_PORT / UPDATE_TLS / UPDATE_BASE_PATH: download
+	    from somewhere other than GitHub raw (optional)
+	  - UPDATE_BUNDLE_MIN_FILES: 2 (optional)
+
+	The v2 manifest's entries are {"path", "size", "sha256"}
+	(tools/make_manifest.py writes it next to the plain path list older
+	updaters read, which is used when there is no v2 manifest). Files whose local size and
+	hash already match are skipped, and every download is checked against
+	them.
+
+	Changed files are downloaded into a staging directory; nothing live is
+	touched until all of them have arrived and verified. They are then
+	swapped in under a journal and run on trial until main.py reaches its
+	first METAR fetch; otherwise the previous files come back
+	(utils/updatejournal.py, boot.py).
+
+	When the manifest names a release bundle (a tar, optionally
+	zlib-compressed) and enough files changed, they all come from that one
+	download, extracted entry by entry straight into the staging directory.
+	Anything the bundle didn't deliver is then fetched file by file.
+
+	Interrupted downloads resume with Range requests, and a failed update
+	leaves its staged files and partial downloads in place: the next run
+	picks up where it stopped, for every file whose manifest hash hasn't
+	changed since.
+
+	A build from tools/build_mpy.py (point GITHUB_SUBDIR at its output) is
+	installed the same way; its manifest names the .mpy version, which must
+	match the firmware's, and activation removes the .py each .mpy replaces
+	(or the .mpy, when going back to source).
 
 	Returns (ok: bool, info: dict)
 	"""
@@ -377,18 +611,28 @@ def run_update(connect_wifi=True):
 	branch = supportjson.readFromJSON("GITHUB_BRANCH") or "main"
 	subdir = supportjson.readFromJSON("GITHUB_SUBDIR") or ""
 	manifest_path = supportjson.readFromJSON("UPDATE_MANIFEST_PATH") or "update_manifest.json"
+	manifest_v2_path = supportjson.readFromJSON("UPDATE_MANIFEST_V2_PATH") or "update_manifest_v2.json"
 
 	allowed_exts = supportjson.readFromJSON("UPDATE_FILE_EXTENSIONS")
 	if not isinstance(allowed_exts, list):
-		allowed_exts = [".py", ".json"]
+		allowed_exts = [".py", ".mpy", ".json"]
 
 	preserve = supportjson.readFromJSON("UPDATE_PRESERVE_FILES")
 	if not isinstance(preserve, list):
 		preserve = ["config.json"]
 
+	dns_ttl = supportjson.readFromJSON("DNS_TTL_S")
+	if dns_ttl is not None:
+		httpclient.DNS_TTL_S = int(dns_ttl)
+
 	if not repo:
 		return False, {"reason": "missing_config", "missing": "GITHUB_REPO"}
 
+	# The previous update hasn't proven itself yet; stacking another one on
+	# top would lose the files it would roll back to.
+	if UpdateJournal.inTrial():
+		return False, {"reason": "trial_pending"}
+
 	owner, name = _repo_owner_and_name(repo)
 	if owner is None:
 		return False, {"reason": "bad_config", "key": "GITHUB_REPO", "value": repo}
@@ -403,16 +647,32 @@ def run_update(connect_wifi=True):
 		except Exception as e:
 			return False, {"reason": "wifi_error", "error": str(e)}
 
-	print("Update starting: repo=", repo, "branch=", branch, "subdir=", subdir)
+	bundle_min = supportjson.readFromJSON("UPDATE_BUNDLE_MIN_FILES")
+	if bundle_min is None:
+		bundle_min = UPDATE_BUNDLE_MIN_FILES
+
+	src = _update_source(repo, branch, subdir)
+	start_ms = time.ticks_ms()
+	print("Update starting: repo=", repo, "branch=", branch, "subdir=", subdir, "source=", src["host"])
 
 	# Prefer a small manifest file if present (more reliable on low memory).
 	files = None
-	try:
-		files = _get_manifest_file_list(repo, branch, subdir, manifest_path)
-		if files:
-			print("Using manifest file list:", manifest_path, "count=", len(files))
-	except Exception as e:
-		print("Manifest fetch failed:", e)
+	bundle = None
+	mpy = None
+	# The v2 manifest has sizes and hashes; the legacy one (plain paths, kept
+	# for boards on older updaters) still works without them.
+	for path in (manifest_v2_path, manifest_path):
+		try:
+			files, bundle, mpy = _get_manifest_file_list(src, path)
+			if files:
+				print("Using manifest file list:", path, "count=", len(files))
+				break
+		except Exception as e:
+			print("Manifest fetch failed:", path, e)
+
+	if files and mpy is not None and not _mpy_compatible(mpy):
+		# Installing it would leave modules this firmware can't import.
+		return False, {"reason": "mpy_mismatch", "mpy": mpy}
 
 	if not files:
 		files, tree_err = _get_tree_file_list(owner, name, branch, subdir, allowed_exts)
@@ -429,44 +689,112 @@ def run_update(connect_wifi=True):
 		else:
 			print("Using GitHub tree file list. count=", len(files))
 
+	entries = []
+	for item in files:
+		entry = _manifest_entry(item)
+		if entry is not None:
+			entries.append(entry)
+
 	# Filter out preserved files.
 	preserve_set = set([str(p).lstrip("/") for p in preserve])
-	files = [f for f in files if str(f).lstrip("/") not in preserve_set]
+	entries = [e for e in entries if e["path"] not in preserve_set]
 
-	# Update ordering: update libraries/utilities first; main/updates last.
-	def _sort_key(p):
-		p = str(p)
-		if p == "updates.py":
+	# Activation order: libraries/utilities first; main/updates last.
+	def _sort_key(e):
+		p = e["path"]
+		if p == "updates.py" or p == "updates.mpy":
 			return (2, p)
 		if p == "main.py":
 			return (3, p)
 		return (1, p)
 
-	files.sort(key=_sort_key)
+	entries.sort(key=_sort_key)
 
-	ok_count = 0
+	skipped = 0
 	fail = []
+	changed = []
+
+	# Files whose size and hash already match are left alone (no download,
+	# no flash write).
+	for entry in entries:
+		if _local_file_matches(entry):
+			skipped += 1
+			print("up to date:", entry["path"])
+		else:
+			changed.append(entry)
+
+	# What an interrupted update left in the stage directory is kept if the
+	# progress journal says it was fetched for the same content: staged files
+	# are reused and partial downloads resume. Anything else is dropped, and
+	# this run's digests are recorded once, before the first download.
+	done = set()
+	digests = {}
+	for entry in changed:
+		relpath = entry["path"]
+		digest = _entry_digest(entry)
+		stage_path = UpdateJournal.stagePath(relpath)
+		if digest is None or UpdateJournal.stagedDigest(relpath) != digest:
+			_remove_quietly(stage_path)
+			_remove_quietly(stage_path + ".tmp")
+		elif _file_size(stage_path) is not None and (
+			entry.get("size") is None or _file_size(stage_path) == int(entry["size"])
+		):
+			done.add(relpath)
+			print("already staged:", relpath)
+		if digest is not None:
+			digests[relpath] = digest
+	UpdateJournal.recordStaging(digests)
 
-	for i, relpath in enumerate(files):
-		gc.collect()
-		relpath = str(relpath).lstrip("/")
-		remote_path = "/{}/{}/{}".format(repo, branch, _join_repo_path(subdir, relpath))
-		print("[{} / {}] GET".format(i + 1, len(files)), remote_path, "->", relpath)
+	try:
+		remaining = [e for e in changed if e["path"] not in done]
+		if bundle is not None and len(remaining) >= int(bundle_min):
+			for name in _stage_bundle(src, bundle, remaining):
+				done.add(name)
+
+		for i, entry in enumerate(changed):
+			relpath = entry["path"]
+			if relpath in done:
+				continue
+			gc.collect()
 
-		ok, err = _http_get_to_file(RAW_HOST, remote_path, relpath, timeout_s=25)
-		if ok:
-			ok_count += 1
-		else:
-			fail.append({"file": relpath, "error": err})
-			# Stop early if something goes wrong; reduces chance of half-updated state.
-			break
+			remote_path = _source_path(src, relpath)
+			print("[{} / {}] GET".format(i + 1, len(changed)), remote_path, "->", relpath)
+
+			ok, err = _http_get_to_file(
+				src["host"], remote_path, UpdateJournal.stagePath(relpath), timeout_s=25, entry=entry,
+				port=src["port"], tls=src["tls"],
+			)
+			if ok:
+				done.add(relpath)
+			else:
+				fail.append({"file": relpath, "error": err})
+				# Nothing live has changed yet. What was staged (and any
+				# partial download) stays for the next attempt to resume.
+				break
+	finally:
+		httpclient.close_all()
+		nettiming.report()
 
-		_sleep_ms(50)
+	ok_count = len(done)
+	elapsed_ms = time.ticks_diff(time.ticks_ms(), start_ms)
 
 	if fail:
-		print("Update failed:", fail[0])
-		return False, {"reason": "download_failed", "ok": ok_count, "failed": fail}
+		print("Update failed:", fail[0], "- staged progress kept:", ok_count)
+		return False, {"reason": "download_failed", "ok": ok_count, "skipped": skipped, "failed": fail}
+
+	# Activate in the sorted order, whichever way each file arrived.
+	staged = [e["path"] for e in changed if e["path"] in done]
+
+	# Switching between source and .mpy builds: drop the other form.
+	listed = set([e["path"] for e in entries])
+	removes = []
+	for e in entries:
+		twin = _module_twin(e["path"])
+		if twin and twin not in listed and _file_size(twin) is not None:
+			removes.append(twin)
 
-	print("Update complete. files_updated=", ok_count)
-	return True, {"updated": ok_count}
+	if (staged or removes) and not UpdateJournal.activate(staged, removes):
+		return False, {"reason": "activate_failed", "ok": ok_count, "skipped": skipped}
 
+	print("Update complete. files_updated=", ok_count, "unchanged=", skipped, "removed=", len(removes), "ms=", elapsed_ms)
+	return True, {"updated": ok_count, "skipped": skipped, "removed": len(removes), "elapsed_ms": elapsed_ms}
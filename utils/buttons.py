@@ -1,10 +1,76 @@
 from machine import Pin
-from utime import ticks_ms, ticks_diff
+from utime import ticks_ms, ticks_diff, ticks_add
+import micropython
 import utils.jsonsupport as supportjson
 
+try:
+    from machine import Timer
+except Exception:
+    Timer = None
+
+try:
+    import uasyncio as asyncio
+except Exception:
+    import asyncio
+
 syncButtonPressed = False
 apButtonPressed = False
 
+#-----Button Events-----
+BUTTON_SYNC = 0
+BUTTON_AP = 1
+BUTTON_NAMES = ("SYNC", "AP")
+
+EVENT_PRESS = 1
+EVENT_RELEASE = 2
+EVENT_LONG_PRESS = 3
+EVENT_NAMES = (None, "press", "release", "long_press")
+
+_LONG_PRESS_MS_DEFAULT = 1500
+_long_press_ms = _LONG_PRESS_MS_DEFAULT
+
+# Fixed-size ring buffer of (button, kind, ticks_ms) events. Slots are
+# preallocated so recording an event never allocates. Scheduled callbacks can
+# run between any two bytecodes of the reader, so the producer only ever moves
+# _evt_tail and the reader only ever moves _evt_head; when full, new events
+# are dropped and counted.
+_EVENT_QUEUE_SIZE = 16
+_evt_button = bytearray(_EVENT_QUEUE_SIZE)
+_evt_kind = bytearray(_EVENT_QUEUE_SIZE)
+_evt_ms = [0] * _EVENT_QUEUE_SIZE
+_evt_head = 0   # next slot to read (reader only)
+_evt_tail = 0   # next slot to write (producer only)
+_evt_dropped = 0
+
+# Each scheduled edge carries its own IRQ timestamp, packed into one small
+# int with the edge code (button * 2 + pressed) in the low 2 bits, so a
+# second edge before the first is handled can't overwrite it. Only the low
+# 28 bits of ticks_ms fit (small ints are 31-bit on the Pico); _on_edge
+# restores the rest from the current tick count, which is fine as long as
+# the scheduler runs the callback within ~74 hours.
+_EDGE_MS_MASK = 0x0FFFFFFF
+
+# Press start used to tell a long press from a short one, by button.
+_press_start_ms = [0, 0]
+
+# EVENT_LONG_PRESS fires while the button is still held: a one-shot timer is
+# armed on every press and cancelled on release. _press_seq tells the timer
+# which press it was armed for, so one left over from an earlier press is
+# ignored. Without Timer the long press is only noticed on release.
+_long_timers = [None, None]
+_long_sent = [False, False]
+_press_seq = [0, 0]
+
+# Wakes whoever is awaiting waitEvent(). ThreadSafeFlag is the uasyncio
+# primitive meant to be set from (soft) interrupt context; CPython's asyncio
+# has no equivalent, so fall back to an Event there.
+try:
+    _event_flag = asyncio.ThreadSafeFlag()
+    _flag_autoclear = True
+except AttributeError:
+    _event_flag = asyncio.Event()
+    _flag_autoclear = False
+
 BUTTON_PIN_SYNC = None
 BUTTON_PIN_AP = None
 
@@ -22,7 +88,7 @@ _last_irq_ap_ms = 0
 
 def startupButtons():
     global BUTTON_PIN_SYNC, BUTTON_PIN_AP
-    global _debounce_ms
+    global _debounce_ms, _long_press_ms
     global _sync_button, _ap_button
     global _sync_latched, _ap_latched
 
@@ -40,6 +106,11 @@ def startupButtons():
         _debounce_ms = int(debounce_from_config)
     print("BUTTON_DEBOUNCE_MS set to", _debounce_ms)
 
+    long_press_from_config = supportjson.readFromJSON("BUTTON_LONG_PRESS_MS")
+    if long_press_from_config is not None:
+        _long_press_ms = int(long_press_from_config)
+    print("BUTTON_LONG_PRESS_MS set to", _long_press_ms)
+
     if BUTTON_PIN_SYNC is not None and BUTTON_PIN_AP is not None:
         # Keep references to Pin objects to avoid accidental GC while IRQs are active.
         _sync_button = Pin(BUTTON_PIN_SYNC, Pin.IN, Pin.PULL_UP)
@@ -57,9 +128,9 @@ def startupButtons():
     print("Buttons complete..")
 
 def buttonPressed(pin):
-    # IRQ handler: must be fast and non-blocking. Debounce by time and
-    # ensure only one "pressed" event per physical press (latched until release).
-    global syncButtonPressed, apButtonPressed
+    # IRQ handler: must be fast and non-blocking. Debounce by time, latch so
+    # only one press/release pair is reported per physical press, and hand the
+    # edge to _on_edge via micropython.schedule (no printing or allocation here).
     global _sync_latched, _ap_latched
     global _last_irq_sync_ms, _last_irq_ap_ms
 
@@ -70,13 +141,11 @@ def buttonPressed(pin):
             return
         _last_irq_sync_ms = now
 
-        if pin.value() == 0:  # pressed (active-low)
-            if not _sync_latched:
-                _sync_latched = True
-                syncButtonPressed = True
-                print("SYNC Button Pressed")
-        else:  # released
-            _sync_latched = False
+        pressed = (pin.value() == 0)  # active-low
+        if pressed == _sync_latched:
+            return
+        _sync_latched = pressed
+        _schedule_edge(now, BUTTON_SYNC * 2 + (1 if pressed else 0))
         return
 
     if pin is _ap_button:
@@ -84,14 +153,156 @@ def buttonPressed(pin):
             return
         _last_irq_ap_ms = now
 
-        if pin.value() == 0:  # pressed (active-low)
-            if not _ap_latched:
-                _ap_latched = True
-                apButtonPressed = True
-                print("AP Button Pressed")
-        else:  # released
-            _ap_latched = False
+        pressed = (pin.value() == 0)  # active-low
+        if pressed == _ap_latched:
+            return
+        _ap_latched = pressed
+        _schedule_edge(now, BUTTON_AP * 2 + (1 if pressed else 0))
+        return
+
+
+def _schedule_edge(ms, code):
+    try:
+        micropython.schedule(_on_edge_ref, ((ms & _EDGE_MS_MASK) << 2) | code)
+    except RuntimeError:
+        # Schedule queue full: the edge is lost, but the latch state above
+        # stays consistent with the pin.
+        pass
+
+
+def _on_edge(arg):
+    # Runs from the scheduler (outside interrupt context): turn the edge into
+    # queue events and wake any waiter.
+    global syncButtonPressed, apButtonPressed
+
+    code = arg & 3
+    button = code >> 1
+    cur = ticks_ms()
+    now = ticks_add(cur, -((cur - (arg >> 2)) & _EDGE_MS_MASK))
+
+    if code & 1:
+        _press_start_ms[button] = now
+        _long_sent[button] = False
+        _press_seq[button] = (_press_seq[button] + 1) & 0xFFFF
+        if button == BUTTON_SYNC:
+            syncButtonPressed = True
+        else:
+            apButtonPressed = True
+        _push_event(button, EVENT_PRESS, now)
+        _arm_long_timer(button, ticks_diff(ticks_add(now, _long_press_ms), cur))
+    else:
+        _cancel_long_timer(button)
+        if not _long_sent[button] and ticks_diff(now, _press_start_ms[button]) >= _long_press_ms:
+            # Timer unavailable (or the release beat it): report it late.
+            _long_sent[button] = True
+            _push_event(button, EVENT_LONG_PRESS, now)
+        _push_event(button, EVENT_RELEASE, now)
+
+    _event_flag.set()
+
+
+def _arm_long_timer(button, delay_ms):
+    if Timer is None:
         return
+    _cancel_long_timer(button)
+    arg = (_press_seq[button] << 1) | button
+    try:
+        timer = Timer(-1)
+        timer.init(
+            mode=Timer.ONE_SHOT,
+            period=max(1, delay_ms),
+            callback=lambda t: _schedule_long(arg),
+        )
+        _long_timers[button] = timer
+    except Exception as e:
+        print("Long-press timer unavailable:", e)
+
+
+def _cancel_long_timer(button):
+    timer = _long_timers[button]
+    if timer is not None:
+        _long_timers[button] = None
+        try:
+            timer.deinit()
+        except Exception:
+            pass
+
+
+def _schedule_long(arg):
+    # Timer callbacks may run in interrupt context; finish in the scheduler.
+    try:
+        micropython.schedule(_on_long_ref, arg)
+    except RuntimeError:
+        # Queue full: the release will report the long press instead.
+        pass
+
+
+def _on_long(arg):
+    button = arg & 1
+    if (arg >> 1) != _press_seq[button] or _long_sent[button]:
+        return
+    _long_timers[button] = None
+    pressed = _sync_latched if button == BUTTON_SYNC else _ap_latched
+    if not pressed:
+        return
+    _long_sent[button] = True
+    _push_event(button, EVENT_LONG_PRESS, ticks_ms())
+    _event_flag.set()
+
+
+# Bound once so micropython.schedule() never has to allocate a reference.
+_on_edge_ref = _on_edge
+_on_long_ref = _on_long
+
+
+def _push_event(button, kind, ms):
+    global _evt_tail, _evt_dropped
+
+    nxt = (_evt_tail + 1) % _EVENT_QUEUE_SIZE
+    if nxt == _evt_head:
+        _evt_dropped += 1
+        return
+
+    slot = _evt_tail
+    _evt_button[slot] = button
+    _evt_kind[slot] = kind
+    _evt_ms[slot] = ms
+    _evt_tail = nxt
+
+
+def getEvent():
+    """Pop the oldest button event as (button, kind, ticks_ms), or None if empty."""
+    global _evt_head
+
+    slot = _evt_head
+    if slot == _evt_tail:
+        return None
+    event = (_evt_button[slot], _evt_kind[slot], _evt_ms[slot])
+    _evt_head = (slot + 1) % _EVENT_QUEUE_SIZE
+    return event
+
+
+async def waitEvent():
+    """Wait until a button event is queued and return it (see getEvent)."""
+    while True:
+        event = getEvent()
+        if event is not None:
+            return event
+        await _event_flag.wait()
+        if not _flag_autoclear:
+            _event_flag.clear()
+
+
+def clearEvents():
+    global _evt_head
+    _evt_head = _evt_tail
+
+
+def getEventStats():
+    return {
+        "queued": (_evt_tail - _evt_head) % _EVENT_QUEUE_SIZE,
+        "dropped": _evt_dropped,
+    }
 
 
 def consumeSyncPressed():
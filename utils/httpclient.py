@@ -0,0 +1,931 @@
+# Small HTTP/1.1 client shared by updates.py and utils/wifi.py.
+#
+# - Keep-alive connections are pooled per (host, port, tls), so several
+#   requests to the same host (e.g. every file of an update from
+#   raw.githubusercontent.com) share one TCP connection and TLS session.
+# - Bodies may be delimited by Content-Length, chunked transfer encoding or
+#   connection close.
+# - A pooled connection the server already closed is detected on reuse and the
+#   request is retried once on a fresh connection.
+# - Everything is received into one long-lived bytearray with readinto().
+#   Header lines are parsed straight out of it and body bytes are handed to
+#   the caller as memoryview slices, so the receive loops don't allocate a new
+#   bytes object per read (the main source of heap fragmentation on the Pico).
+#
+# - Each request's DNS / connect / TLS / time-to-first-byte / transfer
+#   times are recorded in utils.nettiming.
+# - Host lookups go through a small DNS cache (resolve()), shared by every
+#   caller, so repeated connections to the same host don't each pay for a
+#   blocking getaddrinfo round trip. Expired entries are refreshed by
+#   refresh_dns() between requests, not by the request that finds them.
+#
+# Parsing never touches the socket itself: it works on whatever is buffered
+# and returns _NEED_MORE when it runs dry. The blocking API (request, get)
+# then does a blocking readinto, while the asyncio API (arequest, aget) awaits
+# a non-blocking stream instead, so the main loop keeps running during a fetch.
+
+import socket
+import ssl
+
+import utils.nettiming as nettiming
+
+try:
+    import utime as time
+except Exception:
+    import time
+
+try:
+    import uasyncio as asyncio
+except Exception:
+    try:
+        import asyncio
+    except Exception:
+        asyncio = None
+
+
+USER_AGENT = "GroundBoardBA"
+
+# Pooled connections idle longer than this are closed instead of reused.
+HTTP_POOL_IDLE_MS = 20000
+
+# Unread body bytes we are willing to drain to keep a connection reusable.
+_MAX_DRAIN_BYTES = 4096
+
+_MAX_HEADER_BYTES = 4096
+
+# Shared receive buffer. Only one connection reads at a time; a connection
+# that still has unread bytes in it when another one takes over gets them
+# copied out first (see _Connection._claim).
+RX_BUF_SIZE = 1024
+_rx_buf = bytearray(RX_BUF_SIZE)
+_rx_mv = memoryview(_rx_buf)
+_rx_owner = None
+
+_LF = 0x0A
+_CR = 0x0D
+
+# Returned by line/body parsing when more bytes must be received first.
+_NEED_MORE = object()
+
+# Returned by scan_line() for a line that did not fit in the receive buffer.
+_LINE_TOO_LONG = b"\x00"
+
+# Chunked body states.
+_CH_SIZE = 0
+_CH_DATA = 1
+_CH_CRLF = 2
+_CH_TRAILER = 3
+
+_pool = {}
+
+# DNS cache: (host, port) -> [sockaddr, expires_ms, suspect]. An expired
+# entry keeps being served without blocking until refresh_dns() looks the
+# host up again. A connect failure marks the entry suspect, and only then
+# does resolve() itself do the (blocking) lookup, falling back to the old
+# address if that fails too (stale-on-failure).
+DNS_TTL_S = 300
+# After serving a stale entry, wait this long before trying the lookup again.
+DNS_STALE_RETRY_S = 30
+_DNS_MAX_ENTRIES = 8
+_dns = {}
+_dns_hits = 0
+_dns_misses = 0
+_dns_stale = 0
+_dns_failures = 0
+
+
+def _ticks_ms():
+    try:
+        return time.ticks_ms()
+    except Exception:
+        return int(time.time() * 1000)
+
+
+def _ticks_diff(a, b):
+    try:
+        return time.ticks_diff(a, b)
+    except Exception:
+        return a - b
+
+
+def _ticks_add(a, b):
+    try:
+        return time.ticks_add(a, b)
+    except Exception:
+        return a + b
+
+
+def _wrap_tls(sock, host):
+    """Wrap a socket for TLS in a way that works across firmware."""
+    try:
+        return ssl.wrap_socket(sock, server_hostname=host)
+    except Exception:
+        return ssl.wrap_socket(sock)
+
+
+_tls_context = None
+
+
+def _async_tls_context():
+    # asyncio.open_connection(ssl=True) builds a PROTOCOL_TLS_CLIENT context,
+    # which requires a certificate chain the board has no CAs to check. Match
+    # _wrap_tls (ssl.wrap_socket doesn't verify) with an explicit context.
+    global _tls_context
+
+    if _tls_context is None:
+        if not hasattr(ssl, "SSLContext"):
+            return True
+        ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        try:
+            # CPython refuses CERT_NONE while hostname checking is on.
+            ctx.check_hostname = False
+        except Exception:
+            pass
+        ctx.verify_mode = ssl.CERT_NONE
+        _tls_context = ctx
+    return _tls_context
+
+
+class HTTPError(OSError):
+    pass
+
+
+def _lookup(host, port):
+    global _dns_misses
+    _dns_misses += 1
+    t_us = nettiming.ticks_us()
+    addr = socket.getaddrinfo(host, port)[0][-1]
+    nettiming.record("dns", nettiming.elapsed_us(t_us))
+    return addr
+
+
+def _lookup_failed(entry, now):
+    # Lookup failed but we still know where the host was: keep using it.
+    global _dns_failures, _dns_stale
+    _dns_failures += 1
+    _dns_stale += 1
+    entry[1] = _ticks_add(now, DNS_STALE_RETRY_S * 1000)
+    entry[2] = False
+
+
+def resolve(host, port):
+    """Return a sockaddr for (host, port), from the DNS cache when possible.
+
+    Only a host that isn't cached yet, or whose cached address just failed
+    to connect, costs a blocking lookup here.
+    """
+    global _dns_hits, _dns_failures
+
+    key = (host, port)
+    entry = _dns.get(key)
+    now = _ticks_ms()
+    if entry is not None and not entry[2]:
+        _dns_hits += 1
+        return entry[0]
+
+    try:
+        addr = _lookup(host, port)
+    except Exception:
+        if entry is None:
+            _dns_failures += 1
+            raise
+        _lookup_failed(entry, now)
+        return entry[0]
+
+    if entry is None and len(_dns) >= _DNS_MAX_ENTRIES:
+        # Evict whichever entry expires first.
+        oldest = None
+        for k, v in _dns.items():
+            if oldest is None or _ticks_diff(v[1], _dns[oldest][1]) < 0:
+                oldest = k
+        del _dns[oldest]
+
+    _dns[key] = [addr, _ticks_add(now, DNS_TTL_S * 1000), False]
+    return addr
+
+
+def refresh_dns():
+    """Look up again every cached host whose entry has expired.
+
+    Blocks for the lookups, so call it between requests (the main loop does
+    so at the start of each fetch cycle), never from inside one.
+    """
+    now = _ticks_ms()
+    for key, entry in list(_dns.items()):
+        if _ticks_diff(entry[1], now) > 0:
+            continue
+        try:
+            entry[0] = _lookup(key[0], key[1])
+        except Exception:
+            _lookup_failed(entry, now)
+            continue
+        entry[1] = _ticks_add(now, DNS_TTL_S * 1000)
+        entry[2] = False
+
+
+def expire_dns(host, port):
+    """Force the next resolve() of (host, port) to try a fresh lookup."""
+    entry = _dns.get((host, port))
+    if entry is not None:
+        entry[1] = _ticks_ms()
+        entry[2] = True
+
+
+def clear_dns():
+    _dns.clear()
+
+
+def dns_stats():
+    return {
+        "hits": _dns_hits,
+        "misses": _dns_misses,
+        "stale": _dns_stale,
+        "failures": _dns_failures,
+        "entries": len(_dns),
+    }
+
+
+def _addr_host(addr, host):
+    # IP string from a sockaddr, for APIs that take a host name (asyncio);
+    # falls back to the name itself on ports that return packed sockaddrs.
+    if isinstance(addr, tuple) and addr:
+        return addr[0]
+    return host
+
+
+class _Connection:
+    """Blocking socket (optionally TLS) plus its window into the receive buffer."""
+
+    def __init__(self, host, port, tls, timeout_s):
+        self._init_state(host, port, tls)
+
+        addr = resolve(host, port)
+        s = socket.socket()
+        try:
+            self.sock = s
+            self.settimeout(timeout_s)
+            t_us = nettiming.ticks_us()
+            try:
+                s.connect(addr)
+            except Exception:
+                expire_dns(host, port)
+                raise
+            nettiming.record("connect", nettiming.elapsed_us(t_us))
+            if tls:
+                t_us = nettiming.ticks_us()
+                self.stream = _wrap_tls(s, host)
+                nettiming.record("tls", nettiming.elapsed_us(t_us))
+            else:
+                self.stream = s
+            self.settimeout(timeout_s)
+        except Exception:
+            self.close()
+            raise
+
+    def _init_state(self, host, port, tls):
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.sock = None
+        self.stream = None
+        self.eof = False
+        self.last_used_ms = _ticks_ms()
+        # Window of unread bytes in _rx_buf while this connection owns it.
+        self._start = 0
+        self._end = 0
+        # Line scanning progress (relative to _start) and bytes dropped from
+        # a line too long for the buffer.
+        self._scan_off = 0
+        self._dropped = 0
+        # Unread bytes saved when another connection took the buffer.
+        self._spill = None
+
+    def settimeout(self, timeout_s):
+        for obj in (self.sock, self.stream):
+            if obj is None:
+                continue
+            # Some MicroPython SSL sockets don't expose settimeout().
+            try:
+                st = getattr(obj, "settimeout", None)
+                if st:
+                    st(timeout_s)
+            except Exception:
+                pass
+
+    def write(self, data):
+        stream = self.stream
+        try:
+            stream.write(data)
+        except AttributeError:
+            stream.send(data)
+
+    def _claim(self):
+        global _rx_owner
+        owner = _rx_owner
+        if owner is self:
+            return
+        if owner is not None:
+            if owner._end > owner._start:
+                owner._spill = bytes(_rx_mv[owner._start : owner._end])
+            owner._start = owner._end = 0
+        _rx_owner = self
+        self._start = self._end = 0
+        spill = self._spill
+        if spill:
+            self._spill = None
+            _rx_buf[0 : len(spill)] = spill
+            self._end = len(spill)
+
+    def _room(self):
+        """Free space after the unread window, compacting the buffer if needed."""
+        self._claim()
+        start = self._start
+        end = self._end
+        if start == end:
+            self._start = self._end = end = 0
+        elif end == RX_BUF_SIZE and start > 0:
+            # Move the unread tail to the front to make room.
+            size = end - start
+            if size <= start:
+                _rx_buf[0:size] = _rx_mv[start:end]
+            else:
+                for i in range(size):
+                    _rx_buf[i] = _rx_buf[start + i]
+            self._start = 0
+            self._end = end = size
+        return _rx_mv[end:]
+
+    def _received(self, n):
+        if n:
+            self._end += n
+        else:
+            self.eof = True
+        return n
+
+    def _recv_into(self, mv):
+        stream = self.stream
+        try:
+            n = stream.readinto(mv)
+        except AttributeError:
+            n = stream.recv_into(mv)
+        return n or 0
+
+    def fill(self):
+        """Blocking read of more bytes into the buffer; returns the count (0 = EOF)."""
+        room = self._room()
+        if not len(room):
+            return 0
+        return self._received(self._recv_into(room))
+
+    def take(self, n):
+        """Return a view of up to n buffered bytes (possibly empty), valid until the next read."""
+        self._claim()
+        start = self._start
+        count = min(n, self._end - start)
+        self._start = start + count
+        return _rx_mv[start : start + count]
+
+    def scan_line(self, max_bytes):
+        """Return the next buffered line (without CRLF) as a memoryview.
+
+        Returns _NEED_MORE if no complete line is buffered yet, None at end of
+        stream, and _LINE_TOO_LONG for a line that did not fit in the buffer
+        (its bytes are dropped). More than max_bytes without a line ending
+        raises HTTPError.
+        """
+        self._claim()
+        start = self._start
+        end = self._end
+        pos = start + self._scan_off
+        while pos < end:
+            if _rx_buf[pos] == _LF:
+                self._start = pos + 1
+                self._scan_off = 0
+                if self._dropped:
+                    self._dropped = 0
+                    return _LINE_TOO_LONG
+                stop = pos
+                if stop > start and _rx_buf[stop - 1] == _CR:
+                    stop -= 1
+                return _rx_mv[start:stop]
+            pos += 1
+        self._scan_off = pos - start
+        if self._dropped + end - start > max_bytes:
+            raise HTTPError("HTTP line too long")
+        if self.eof:
+            return None
+        if start == 0 and end == RX_BUF_SIZE:
+            # Longer than the whole buffer: drop it and keep looking for LF.
+            self._dropped += end
+            self._start = self._end = self._scan_off = 0
+        return _NEED_MORE
+
+    def close(self):
+        global _rx_owner
+        if _rx_owner is self:
+            _rx_owner = None
+        for obj in (self.stream, self.sock):
+            if obj is None:
+                continue
+            try:
+                obj.close()
+            except Exception:
+                pass
+        self.stream = None
+        self.sock = None
+        self._start = self._end = 0
+        self._spill = None
+
+
+class _AsyncConnection(_Connection):
+    """Non-blocking connection driven by asyncio streams."""
+
+    def __init__(self, host, port, tls):
+        self._init_state(host, port, tls)
+        self._reader = None
+        self._timeout_s = None
+
+    async def open(self, timeout_s):
+        self._timeout_s = timeout_s
+        # Connect to the cached address; the name still goes in SNI.
+        ip = _addr_host(resolve(self.host, self.port), self.host)
+        if self.tls:
+            coro = asyncio.open_connection(ip, self.port, ssl=_async_tls_context(), server_hostname=self.host)
+        else:
+            coro = asyncio.open_connection(ip, self.port)
+        t_us = nettiming.ticks_us()
+        try:
+            self._reader, self.stream = await asyncio.wait_for(coro, timeout_s)
+        except Exception:
+            expire_dns(self.host, self.port)
+            raise
+        # TCP only: MicroPython wraps the socket with
+        # do_handshake_on_connect=False, so the TLS handshake runs on the first
+        # write (timed as "tls" by arequest).
+        nettiming.record("connect", nettiming.elapsed_us(t_us))
+
+    async def _areadinto(self, mv):
+        # A non-blocking TLS stream returns None while only part of a record
+        # has arrived: wait for more. Only an actual 0 (or b"") is EOF.
+        reader = self._reader
+        while True:
+            if hasattr(reader, "readinto"):
+                n = await reader.readinto(mv)
+                if n is not None:
+                    return n
+            else:
+                data = await reader.read(len(mv))
+                if data is not None:
+                    mv[0 : len(data)] = data
+                    return len(data)
+
+    async def afill(self):
+        room = self._room()
+        if not len(room):
+            return 0
+        n = await asyncio.wait_for(self._areadinto(room), self._timeout_s)
+        return self._received(n)
+
+    async def awrite(self, data):
+        self.stream.write(data)
+        await asyncio.wait_for(self.stream.drain(), self._timeout_s)
+
+    def fill(self):
+        raise HTTPError("blocking read on an asyncio connection")
+
+    def close(self):
+        reader = self._reader
+        self._reader = None
+        super().close()
+        if reader is not None and hasattr(reader, "close"):
+            try:
+                reader.close()
+            except Exception:
+                pass
+
+
+def _ascii(mv):
+    return bytes(mv).decode("utf-8", "ignore")
+
+
+class Response:
+    def __init__(self, conn, method):
+        self.status = None
+        self.reason = ""
+        self.headers = {}
+        self._conn = conn
+        self._method = method
+        self._version_11 = False
+        self._keep_alive = True
+        self._head_done = False
+        self._header_bytes = 0
+        self._remaining = None   # Content-Length bytes left, or None
+        self._chunked = False
+        self._chunk_state = _CH_SIZE
+        self._chunk_left = 0
+        self._done = False
+        # ticks_us when the request started and when its headers were parsed.
+        self._t_start_us = None
+        self._t_head_us = None
+
+    # ----- Status line and headers -----
+
+    def _parse_head(self):
+        """Parse buffered header lines; returns True when done, else _NEED_MORE."""
+        conn = self._conn
+        while True:
+            line = conn.scan_line(_MAX_HEADER_BYTES)
+            if line is _NEED_MORE:
+                return line
+            if line is None:
+                raise HTTPError("connection closed in response headers")
+            if self.status is None:
+                if line is _LINE_TOO_LONG:
+                    raise HTTPError("no HTTP status line")
+                self._parse_status(_ascii(line))
+                continue
+            if line is _LINE_TOO_LONG:
+                continue
+            if not len(line):
+                break
+            self._header_bytes += len(line)
+            if self._header_bytes > _MAX_HEADER_BYTES:
+                raise HTTPError("HTTP header too large")
+            self._parse_header(line)
+
+        self._head_done = True
+        self._setup_body()
+        return True
+
+    def _parse_status(self, line):
+        try:
+            parts = line.strip().split(" ", 2)
+            self.status = int(parts[1])
+            self._version_11 = parts[0] == "HTTP/1.1"
+            if len(parts) > 2:
+                self.reason = parts[2]
+        except Exception:
+            raise HTTPError("bad status line")
+
+    def _parse_header(self, line):
+        # Find the colon in place; only the name and value become strings.
+        for i in range(len(line)):
+            if line[i] == 0x3A:
+                self.headers[_ascii(line[:i]).strip().lower()] = _ascii(line[i + 1 :]).strip()
+                return
+
+    def _setup_body(self):
+        conn_hdr = self.headers.get("connection", "").lower()
+        if conn_hdr == "close" or (not self._version_11 and conn_hdr != "keep-alive"):
+            self._keep_alive = False
+
+        status = self.status
+        if self._method == "HEAD" or status in (204, 304) or status < 200:
+            self._done = True
+            return
+
+        te = self.headers.get("transfer-encoding", "").lower()
+        if "chunked" in te:
+            self._chunked = True
+            return
+
+        clen = self.headers.get("content-length")
+        if clen is not None:
+            try:
+                self._remaining = int(clen)
+            except Exception:
+                self._remaining = None
+        if self._remaining is None:
+            # Body ends when the server closes the connection.
+            self._keep_alive = False
+        elif self._remaining == 0:
+            self._done = True
+
+    @property
+    def content_length(self):
+        try:
+            return int(self.headers.get("content-length"))
+        except Exception:
+            return None
+
+    # ----- Body -----
+
+    def _next_view(self, n):
+        """Next body bytes from the buffer: a view, b"" at end of body, or _NEED_MORE."""
+        if self._done:
+            return b""
+        conn = self._conn
+
+        if self._chunked:
+            while True:
+                state = self._chunk_state
+                if state == _CH_DATA:
+                    view = conn.take(min(n, self._chunk_left))
+                    if not len(view):
+                        if conn.eof:
+                            raise HTTPError("truncated chunked body")
+                        return _NEED_MORE
+                    self._chunk_left -= len(view)
+                    if self._chunk_left == 0:
+                        self._chunk_state = _CH_CRLF
+                    return view
+
+                line = conn.scan_line(1024)
+                if line is _NEED_MORE:
+                    return line
+                if state == _CH_TRAILER:
+                    # Skip optional trailer headers up to the terminating blank line.
+                    if line is None or not len(line):
+                        self._done = True
+                        return b""
+                    continue
+                if line is None:
+                    raise HTTPError("truncated chunked body")
+                if state == _CH_CRLF:
+                    # The CRLF that ends each chunk.
+                    self._chunk_state = _CH_SIZE
+                    continue
+                size_s = _ascii(line).strip().split(";", 1)[0]
+                try:
+                    size = int(size_s, 16)
+                except Exception:
+                    raise HTTPError("bad chunk size")
+                if size == 0:
+                    self._chunk_state = _CH_TRAILER
+                else:
+                    self._chunk_left = size
+                    self._chunk_state = _CH_DATA
+
+        if self._remaining is not None:
+            view = conn.take(min(n, self._remaining))
+            if not len(view):
+                if conn.eof:
+                    raise HTTPError("truncated body")
+                return _NEED_MORE
+            self._remaining -= len(view)
+            if self._remaining == 0:
+                self._done = True
+            return view
+
+        view = conn.take(n)
+        if not len(view):
+            if conn.eof:
+                self._done = True
+                return b""
+            return _NEED_MORE
+        return view
+
+    def read_view(self, n=RX_BUF_SIZE):
+        """Return up to n body bytes as a memoryview into the shared receive buffer.
+
+        The view is only valid until the next read on any connection; copy it
+        (or write it out) before reading again. Returns b"" once the body is
+        complete.
+        """
+        while True:
+            view = self._next_view(n)
+            if view is not _NEED_MORE:
+                return view
+            self._conn.fill()
+
+    async def aread_view(self, n=RX_BUF_SIZE):
+        """Awaitable read_view() for responses from arequest()."""
+        while True:
+            view = self._next_view(n)
+            if view is not _NEED_MORE:
+                return view
+            await self._conn.afill()
+
+    def readinto(self, mv):
+        """Read body bytes into a caller-supplied buffer; returns the count (0 at end)."""
+        view = self.read_view(len(mv))
+        count = len(view)
+        if count:
+            mv[0:count] = view
+        return count
+
+    def read(self, n=512):
+        """Read up to n body bytes as a new bytes object; returns b"" once the body is complete."""
+        view = self.read_view(n)
+        return bytes(view) if view else b""
+
+    def read_all(self, max_bytes=200000):
+        chunks = []
+        size = 0
+        while True:
+            chunk = self.read(1024)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > max_bytes:
+                raise MemoryError("HTTP body exceeded max_bytes")
+        return b"".join(chunks)
+
+    def _record_timing(self):
+        if self._t_head_us is None or not self._done:
+            return
+        nettiming.record("transfer", nettiming.elapsed_us(self._t_head_us))
+        if self._t_start_us is not None:
+            nettiming.record("total", nettiming.elapsed_us(self._t_start_us))
+        self._t_head_us = None
+
+    def _head_received(self, t_start_us, t_sent_us):
+        # Time to first byte: request written -> status line and headers parsed.
+        self._t_start_us = t_start_us
+        self._t_head_us = nettiming.ticks_us()
+        nettiming.record("ttfb", nettiming.elapsed_us(t_sent_us))
+
+    def close(self):
+        """Finish with the response; the connection goes back to the pool if reusable."""
+        conn = self._conn
+        if conn is None:
+            return
+        self._conn = None
+        self._record_timing()
+
+        reusable = self._keep_alive and self._head_done
+        if reusable and not self._done:
+            # Drain a small remainder so the connection can be reused.
+            self._conn = conn
+            drained = 0
+            try:
+                while not self._done and drained <= _MAX_DRAIN_BYTES:
+                    drained += len(self.read_view())
+            except Exception:
+                pass
+            self._conn = None
+            reusable = self._done
+
+        if reusable:
+            conn.last_used_ms = _ticks_ms()
+            _release(conn)
+        else:
+            conn.close()
+
+    def abort(self):
+        """Close the underlying connection without returning it to the pool."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # Body state is unknown after an error; never reuse the connection.
+            self.abort()
+        self.close()
+
+
+def _pool_key(host, port, tls):
+    return "{}:{}:{}".format(host, port, 1 if tls else 0)
+
+
+def _acquire(host, port, tls):
+    key = _pool_key(host, port, tls)
+    conn = _pool.pop(key, None)
+    if conn is None:
+        return None
+    if _ticks_diff(_ticks_ms(), conn.last_used_ms) > HTTP_POOL_IDLE_MS:
+        conn.close()
+        return None
+    return conn
+
+
+def _release(conn):
+    key = _pool_key(conn.host, conn.port, conn.tls)
+    old = _pool.get(key)
+    if old is not None and old is not conn:
+        old.close()
+    _pool[key] = conn
+
+
+def close_idle(max_idle_ms=None):
+    """Close pooled connections idle longer than max_idle_ms (default HTTP_POOL_IDLE_MS)."""
+    if max_idle_ms is None:
+        max_idle_ms = HTTP_POOL_IDLE_MS
+    now = _ticks_ms()
+    for key in list(_pool.keys()):
+        conn = _pool[key]
+        if _ticks_diff(now, conn.last_used_ms) > max_idle_ms:
+            conn.close()
+            del _pool[key]
+
+
+def close_all():
+    for key in list(_pool.keys()):
+        _pool.pop(key).close()
+
+
+def _format_request(method, host, port, tls, path, headers, keep_alive):
+    default_port = 443 if tls else 80
+    host_hdr = host if port == default_port else "{}:{}".format(host, port)
+    req = (
+        "{} {} HTTP/1.1\r\n"
+        "Host: {}\r\n"
+        "User-Agent: {}\r\n"
+        "Accept-Encoding: identity\r\n"
+        "Connection: {}\r\n"
+    ).format(method, path, host_hdr, USER_AGENT, "keep-alive" if keep_alive else "close")
+    has_accept = False
+    if headers:
+        for k, v in headers.items():
+            if k.lower() == "accept":
+                has_accept = True
+            req += "{}: {}\r\n".format(k, v)
+    if not has_accept:
+        req += "Accept: */*\r\n"
+    return (req + "\r\n").encode("utf-8")
+
+
+def _send_and_read_head(conn, req, method, t_start_us):
+    t_sent_us = nettiming.ticks_us()
+    conn.write(req)
+    resp = Response(conn, method)
+    while resp._parse_head() is _NEED_MORE:
+        conn.fill()
+    resp._head_received(t_start_us, t_sent_us)
+    return resp
+
+
+def request(method, host, path, port=443, tls=True, headers=None, timeout_s=12, keep_alive=True):
+    """Send a request and return a Response once the status line and headers arrive.
+
+    The caller must close() the response (or use it as a context manager) so
+    the connection can be returned to the pool.
+    """
+    t_start_us = nettiming.ticks_us()
+    req = _format_request(method, host, port, tls, path, headers, keep_alive)
+
+    conn = _acquire(host, port, tls) if keep_alive else None
+    if conn is not None:
+        conn.settimeout(timeout_s)
+        try:
+            resp = _send_and_read_head(conn, req, method, t_start_us)
+            nettiming.record_connection(True)
+            if not keep_alive:
+                resp._keep_alive = False
+            return resp
+        except Exception:
+            # The server most likely closed the idle connection; start over.
+            conn.close()
+
+    conn = _Connection(host, port, tls, timeout_s)
+    nettiming.record_connection(False)
+    try:
+        resp = _send_and_read_head(conn, req, method, t_start_us)
+    except Exception:
+        conn.close()
+        raise
+    if not keep_alive:
+        resp._keep_alive = False
+    return resp
+
+
+def get(host, path, **kwargs):
+    return request("GET", host, path, **kwargs)
+
+
+def get_to_bytes(host, path, max_bytes=200000, **kwargs):
+    """GET path and return (status, body bytes)."""
+    with get(host, path, **kwargs) as resp:
+        return resp.status, resp.read_all(max_bytes)
+
+
+async def arequest(method, host, path, port=443, tls=True, headers=None, timeout_s=12):
+    """asyncio version of request(); read the body with Response.aread_view().
+
+    The connection is not pooled (METAR polls are minutes apart), so the
+    request asks the server to close it. Every socket wait is bounded by
+    timeout_s and yields to other tasks.
+    """
+    if asyncio is None:
+        raise HTTPError("asyncio not available")
+    t_start_us = nettiming.ticks_us()
+    req = _format_request(method, host, port, tls, path, headers, False)
+    conn = _AsyncConnection(host, port, tls)
+    try:
+        await conn.open(timeout_s)
+        nettiming.record_connection(False)
+        t_sent_us = nettiming.ticks_us()
+        await conn.awrite(req)
+        if tls:
+            # Draining the first write drives the TLS handshake; keep it out
+            # of ttfb. (The few request bytes ride along in "tls".)
+            nettiming.record("tls", nettiming.elapsed_us(t_sent_us))
+            t_sent_us = nettiming.ticks_us()
+        resp = Response(conn, method)
+        resp._keep_alive = False
+        while resp._parse_head() is _NEED_MORE:
+            await conn.afill()
+        resp._head_received(t_start_us, t_sent_us)
+        return resp
+    except Exception:
+        conn.close()
+        raise
+
+
+async def aget(host, path, **kwargs):
+    return await arequest("GET", host, path, **kwargs)
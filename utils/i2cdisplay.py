@@ -10,18 +10,16 @@ DISPLAY_HEIGHT = 64
 DISPLAY_CHAR_WIDTH = 8  # 8x8 font in ssd1306
 DISPLAY_ROW_HEIGHT = 8  # 10 pixels per character row
 
+DISPLAY_ROWS = DISPLAY_HEIGHT // DISPLAY_ROW_HEIGHT
+
 #-----Display Variables-----
 displayI2C = None
 displayObject = None
 
-display_row0 = ""
-display_row1 = ""
-display_row2 = ""
-display_row3 = ""
-display_row4 = ""
-display_row5 = ""
-display_row6 = ""
-display_row7 = ""
+# Row model: _rows holds the text each row should show, _drawn the text that
+# is currently rasterized in the framebuffer (None = unknown, force a redraw).
+_rows = [""] * DISPLAY_ROWS
+_drawn = [None] * DISPLAY_ROWS
 
 def startupDisplay():
     global displayI2C, displayObject
@@ -30,45 +28,58 @@ def startupDisplay():
     displayObject = SSD1306_I2C(DISPLAY_WIDTH, DISPLAY_HEIGHT, displayI2C)
     displayObject.contrast(DISPLAY_CONTRAST)
 
+    for i in range(DISPLAY_ROWS):
+        _drawn[i] = None
+
     if displayI2C is not None and displayObject is not None:
         return True
 
     return False
 
+def set_row(row, text):
+    if row < 0 or row >= DISPLAY_ROWS:
+        return
+    if text is None:
+        text = ""
+    elif not isinstance(text, str):
+        text = str(text)
+    _rows[row] = text
+
+def set_rows(rows):
+    # rows: {row_index: text}
+    for row, text in rows.items():
+        set_row(row, text)
+
+def get_row(row):
+    return _rows[row]
+
 def displayCenterText(display, text, row):
     # text: string to draw
-    # y   : vertical position in pixels
+    # row : text row (0-7); the caller flushes with display.show()
     text_len = len(text)
     text_width = text_len * DISPLAY_CHAR_WIDTH
     x = max(0, (DISPLAY_WIDTH - text_width) // 2)
     display.text(text, x, row*DISPLAY_ROW_HEIGHT)
-    display.show()
 
 def displayRefresh():
-    global displayObject, display_row0, display_row1, display_row2, display_row3, display_row4, display_row5, display_row6, display_row7
-    
-    if displayObject is not None:
-        displayObject.fill(0)
-
-        displayCenterText(displayObject, display_row0, 0)
-        displayCenterText(displayObject, display_row1, 1)
-        displayCenterText(displayObject, display_row2, 2)
-        displayCenterText(displayObject, display_row3, 3)
-        displayCenterText(displayObject, display_row4, 4)
-        displayCenterText(displayObject, display_row5, 5)
-        displayCenterText(displayObject, display_row6, 6)
-        displayCenterText(displayObject, display_row7, 7)
+    if displayObject is None:
+        return
+
+    # Only clear and re-rasterize rows whose text changed since the last frame.
+    for row in range(DISPLAY_ROWS):
+        text = _rows[row]
+        if text == _drawn[row]:
+            continue
+        displayObject.fill_rect(0, row * DISPLAY_ROW_HEIGHT, DISPLAY_WIDTH, DISPLAY_ROW_HEIGHT, 0)
+        if text:
+            displayCenterText(displayObject, text, row)
+        _drawn[row] = text
+
+    # One flush per frame; the driver only sends pages that changed.
+    displayObject.show()
 
 def displayClear():
-    global display_row0, display_row1, display_row2, display_row3, display_row4, display_row5, display_row6, display_row7
-    
-    display_row0 = ""
-    display_row1 = ""
-    display_row2 = ""
-    display_row3 = ""
-    display_row4 = ""
-    display_row5 = ""
-    display_row6 = ""
-    display_row7 = ""
-
-    displayRefresh()
\ No newline at end of file
+    for row in range(DISPLAY_ROWS):
+        _rows[row] = ""
+
+    displayRefresh()
@@ -1,27 +1,126 @@
 import json
 
+try:
+    import uos as os
+except Exception:
+    import os
+
 #-----json Config-----
 JSON_CONFIG_FILE = "config.json"
+JSON_CONFIG_TMP_FILE = JSON_CONFIG_FILE + ".tmp"
 
 #-----json Variables-----
+# Process-wide copy of config.json, parsed once and reused by every reader.
+_config = None
+_cache_hits = 0
+_cache_misses = 0
 
-def readFromJSON(key):
+def _loadConfig():
+    global _config, _cache_misses
+
+    _cache_misses += 1
     try:
         with open(JSON_CONFIG_FILE, 'r') as jsonFile:
             data = json.load(jsonFile)
-            return data.get(key, None)
+    except OSError:
+        # A power cut between the remove and the rename in replaceFile()
+        # leaves only the finished temp file: finish the job.
+        with open(JSON_CONFIG_TMP_FILE, 'r') as jsonFile:
+            data = json.load(jsonFile)
+        print("Recovering config.json from", JSON_CONFIG_TMP_FILE)
+        replaceFile(JSON_CONFIG_TMP_FILE, JSON_CONFIG_FILE)
+    if not isinstance(data, dict):
+        data = {}
+    _config = data
+    return data
+
+def _copyValue(value):
+    # Lists/dicts from the cache are copied so a caller that changes one
+    # can't change what every later reader gets.
+    if isinstance(value, dict):
+        return {k: _copyValue(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copyValue(v) for v in value]
+    return value
+
+def readFromJSON(key):
+    global _cache_hits
+
+    try:
+        data = _config
+        if data is None:
+            data = _loadConfig()
+        else:
+            _cache_hits += 1
+        return _copyValue(data.get(key, None))
     except Exception as e:
         print("Error reading JSON config:", e)
         return None
-    
-def writeToJSON(key, value):
+
+def invalidateJSONCache():
+    # Drop the cached config so the next read re-parses config.json.
+    global _config
+    _config = None
+
+def getJSONCacheStats():
+    return {
+        "hits": _cache_hits,
+        "misses": _cache_misses,
+        "loaded": _config is not None,
+    }
+
+def replaceFile(tmp_path, dest_path):
+    # rename() over an existing file is atomic on littlefs; other filesystems
+    # refuse it, so fall back to remove + rename.
     try:
-        with open(JSON_CONFIG_FILE, 'r') as jsonFile:
-            data = json.load(jsonFile)
-        
-        data[key] = value
-        
-        with open(JSON_CONFIG_FILE, 'w') as jsonFile:
+        os.rename(tmp_path, dest_path)
+    except OSError:
+        try:
+            os.remove(dest_path)
+        except OSError:
+            pass
+        os.rename(tmp_path, dest_path)
+
+def writeManyToJSON(changes):
+    """Apply several key changes to config.json in a single write.
+
+    The new file is written to a temp file and renamed over config.json, so a
+    power cut leaves either the old or the new config. Nothing is written when
+    every value already matches. Returns True on success (including no-op).
+    """
+    global _config
+
+    try:
+        data = _config
+        if data is None:
+            data = _loadConfig()
+
+        changed = False
+        for key, value in changes.items():
+            if key not in data or data[key] != value:
+                changed = True
+                break
+        if not changed:
+            return True
+
+        data = dict(data)
+        for key, value in changes.items():
+            data[key] = _copyValue(value)
+
+        with open(JSON_CONFIG_TMP_FILE, 'w') as jsonFile:
             json.dump(data, jsonFile)
+        replaceFile(JSON_CONFIG_TMP_FILE, JSON_CONFIG_FILE)
+
+        _config = data
+        return True
     except Exception as e:
-        print("Error writing to JSON config:", e)
\ No newline at end of file
+        print("Error writing to JSON config:", e)
+        invalidateJSONCache()
+        try:
+            os.remove(JSON_CONFIG_TMP_FILE)
+        except Exception:
+            pass
+        return False
+
+def writeToJSON(key, value):
+    return writeManyToJSON({key: value})
@@ -1,5 +1,11 @@
 from machine import Pin
-from utime import sleep
+from utime import sleep_ms, ticks_ms, ticks_diff
+import math
+
+try:
+    from machine import Timer
+except ImportError:
+    Timer = None
 import neopixel
 import utils.jsonsupport as supportjson
 
@@ -8,9 +14,50 @@ import utils.jsonsupport as supportjson
 LED_PIN = None
 LED_COUNT = None
 
+# One heading per LED index. If left as None, we default to evenly-spaced
+# headings based on LED_COUNT.
+RUNWAY_HEADINGS = None
+LED_BRIGHTNESS = None
+CROSSWIND_THRESHOLD_KTS = None
+
+# Total time for the power-on animation, whatever the LED count.
+LED_STARTUP_BUDGET_MS = 1500
+
 #-----LED Variables-----
 ledObject = None
 
+#-----Startup Animation-----
+_ANIM_FRAME_MS = 20
+_ANIM_COLORS = ((0, 255, 0), (255, 0, 0), (0, 0, 255))  # Red, Green, Blue
+_anim_timer = None
+_anim_step = -1
+_anim_start_ms = 0
+
+# Copy of the bytes last sent to the strip. flush() compares against it and
+# skips write() when the frame is unchanged; None forces the next write.
+_shown = None
+_writes = 0
+_skipped_writes = 0
+
+#-----Wind Color Engine-----
+# Runway unit vectors are stored as fixed-point integers scaled by 1 << 10,
+# and the wind vector is scaled the same way, so the per-LED head/crosswind
+# components come out scaled by 1 << 20 and need no floats or trig.
+_VEC_SHIFT = 10
+_VEC_SCALE = 1 << _VEC_SHIFT
+
+_CALM_WIND_KTS = 3
+
+_rwy_cos = []
+_rwy_sin = []
+_crosswind_limit = 0    # CROSSWIND_THRESHOLD_KTS scaled by 1 << 20
+
+# Palette entries pre-encoded in the strip's byte order, ready to copy into
+# ledObject.buf. Colors are (Green, Red, Blue) tuples like the rest of the board.
+_pal_good = None        # calm or headwind
+_pal_crosswind = None   # headwind with significant crosswind
+_pal_tailwind = None
+
 def startupLED():
     global ledObject, LED_PIN, LED_COUNT
 
@@ -19,58 +66,256 @@ def startupLED():
         LED_COUNT = supportjson.readFromJSON("LED_COUNT")
 
     ledObject = neopixel.NeoPixel(Pin(LED_PIN), LED_COUNT)
+    invalidateFrame()
+
+    loadWindConfig()
 
     startupSequenceLED()
 
+def setPixel(index, color):
+    """Stage one LED's color; nothing is sent until flush()."""
+    _stop_animation()
+    if ledObject is not None:
+        ledObject[index] = color
+
+def fill(color):
+    """Stage every LED to one color; nothing is sent until flush()."""
+    _stop_animation()
+    if ledObject is not None:
+        ledObject.fill(color)
+
+def flush(force=False):
+    """Send the staged frame to the strip if it differs from what is lit.
+
+    Returns True when write() actually ran.
+    """
+    global _shown, _writes, _skipped_writes
+
+    if ledObject is None:
+        return False
+
+    buf = ledObject.buf
+    if not force and _shown is not None and _shown == buf:
+        _skipped_writes += 1
+        return False
+
+    ledObject.write()
+    _writes += 1
+    if _shown is None or len(_shown) != len(buf):
+        _shown = bytearray(buf)
+    else:
+        _shown[:] = buf
+    return True
+
+def invalidateFrame():
+    # Use after writing to ledObject directly, so the next flush() always sends.
+    global _shown
+    _shown = None
+
+def getFrameStats():
+    return {"writes": _writes, "skipped": _skipped_writes}
+
+def loadWindConfig():
+    """Read the runway/brightness/crosswind config and rebuild the lookup tables."""
+    global RUNWAY_HEADINGS, LED_BRIGHTNESS, CROSSWIND_THRESHOLD_KTS
+
+    LED_BRIGHTNESS = supportjson.readFromJSON("LED_BRIGHTNESS")
+    if LED_BRIGHTNESS is None:
+        LED_BRIGHTNESS = 100
+    print("LED_BRIGHTNESS set to", LED_BRIGHTNESS)
+
+    CROSSWIND_THRESHOLD_KTS = supportjson.readFromJSON("CROSSWIND_THRESHOLD_KTS")
+    if CROSSWIND_THRESHOLD_KTS is None:
+        CROSSWIND_THRESHOLD_KTS = 10
+    print("CROSSWIND_THRESHOLD_KTS set to", CROSSWIND_THRESHOLD_KTS)
+
+    RUNWAY_HEADINGS = supportjson.readFromJSON("RUNWAY_HEADINGS")
+    if RUNWAY_HEADINGS is None and LED_COUNT:
+        RUNWAY_HEADINGS = [i * 360 // LED_COUNT for i in range(LED_COUNT)]
+    print("RUNWAY_HEADINGS set to", RUNWAY_HEADINGS)
+
+    _build_wind_tables()
+
+def _encode_color(color):
+    # Lay the tuple out the way NeoPixel.__setitem__ would, once, up front.
+    order = getattr(ledObject, "ORDER", (1, 0, 2, 3))
+    bpp = getattr(ledObject, "bpp", 3)
+    encoded = bytearray(bpp)
+    for i in range(bpp):
+        encoded[order[i]] = color[i] if i < len(color) else 0
+    return bytes(encoded)
+
+def _build_wind_tables():
+    global _rwy_cos, _rwy_sin, _crosswind_limit
+    global _pal_good, _pal_crosswind, _pal_tailwind
+
+    headings = RUNWAY_HEADINGS or []
+    if LED_COUNT is not None:
+        headings = headings[:LED_COUNT]
+
+    _rwy_cos = []
+    _rwy_sin = []
+    for heading in headings:
+        rad = (int(heading) % 360) * math.pi / 180.0
+        _rwy_cos.append(int(round(math.cos(rad) * _VEC_SCALE)))
+        _rwy_sin.append(int(round(math.sin(rad) * _VEC_SCALE)))
+
+    _crosswind_limit = int(CROSSWIND_THRESHOLD_KTS) << (2 * _VEC_SHIFT)
+
+    level = 255 * LED_BRIGHTNESS // 100
+    _pal_good = _encode_color((level, 0, 0))
+    _pal_crosswind = _encode_color((level, level, 0))
+    _pal_tailwind = _encode_color((0, level, 0))
+
+def setWindColors(wind_dir, wind_speed):
+    """Color each runway LED for the given wind and write the strip once.
+
+    Green: calm (<= 3 kt) or a headwind component. Yellow: headwind with a
+    crosswind component above CROSSWIND_THRESHOLD_KTS. Red: tailwind.
+    A variable ("VRB") or missing direction is shown like calm wind.
+    """
+    if ledObject is None:
+        return
+    _stop_animation()
+    if _pal_good is None:
+        loadWindConfig()
+
+    wind_speed = float(wind_speed or 0)
+
+    try:
+        wind_dir = int(wind_dir)
+    except (TypeError, ValueError):
+        wind_dir = None
+
+    buf = ledObject.buf
+    bpp = len(_pal_good)
+    count = len(_rwy_cos)
+
+    if wind_speed <= _CALM_WIND_KTS or wind_dir is None:
+        good = _pal_good
+        for i in range(count):
+            o = i * bpp
+            buf[o:o + bpp] = good
+        flush()
+        return
+
+    # Wind vector in the same fixed-point scale as the runway vectors.
+    rad = (wind_dir % 360) * math.pi / 180.0
+    wind_cos = int(round(wind_speed * math.cos(rad) * _VEC_SCALE))
+    wind_sin = int(round(wind_speed * math.sin(rad) * _VEC_SCALE))
+
+    rwy_cos = _rwy_cos
+    rwy_sin = _rwy_sin
+    limit = _crosswind_limit
+    good = _pal_good
+    crosswind = _pal_crosswind
+    tailwind = _pal_tailwind
+
+    o = 0
+    for i in range(count):
+        c = rwy_cos[i]
+        s = rwy_sin[i]
+        # speed*cos(wind - runway) and speed*sin(wind - runway), scaled 1 << 20.
+        head = wind_cos * c + wind_sin * s
+        if head > 0:
+            cross = wind_sin * c - wind_cos * s
+            if cross > limit or -cross > limit:
+                buf[o:o + bpp] = crosswind
+            else:
+                buf[o:o + bpp] = good
+        else:
+            buf[o:o + bpp] = tailwind
+        o += bpp
+
+    flush()
+
 def startupSequenceLED():
-    global ledObject, LED_COUNT
-
-    if ledObject is not None and LED_COUNT is not None:
-        for i in range(LED_COUNT):
-            ledObject[i] = (0, 255, 0)  # Red
-            ledObject.write()
-            sleep(0.3)
-            ledObject[i] = (255, 0, 0)  # Green
-            ledObject.write()
-            sleep(0.3)
-            ledObject[i] = (0, 0, 255)  # Blue
-            ledObject.write()
-            sleep(0.3)
-        
-        # for i in range(LED_COUNT):
-        #     ledObject[i] = (0, 0, 0)  # Off
-        #     ledObject.write()
-        #     sleep(0.3)
-        JSONBRIGHTNESS = supportjson.readFromJSON("LED_BRIGHTNESS")
-        if JSONBRIGHTNESS is None:
-            JSONBRIGHTNESS = 100
-
-        ledObject.fill((0,0,int(255 * JSONBRIGHTNESS / 100)))
-        ledObject.write()
-        sleep(1)
-        
-        #ledObject.fill((0,10,10))
-        #ledObject.write()
-
-        # sleep(5)
-
-        # #Test Red
-        # ledObject.fill((0,255,0))
-        # ledObject.write()
-        # sleep(1)
-
-        # #Test Green
-        # ledObject.fill((255,0,0))
-        # ledObject.write()
-        # sleep(1)
-
-        # #Test Blue
-        # ledObject.fill((0,0,255))
-        # ledObject.write()
-        # sleep(1)
-
-        # #Turn Off
-        # ledObject.fill((0,0,0))
-        # ledObject.write()
-        # sleep(1)
-        
+    """Start the power-on animation in the background and return immediately.
+
+    Each LED steps red -> green -> blue in turn, then the strip settles on
+    blue at LED_BRIGHTNESS. The whole sequence is stretched or squeezed to
+    LED_STARTUP_BUDGET_MS regardless of LED_COUNT, and is driven by a
+    machine.Timer so boot (display, config, WiFi) carries on meanwhile.
+    """
+    global LED_STARTUP_BUDGET_MS, _anim_step, _anim_start_ms, _anim_timer
+
+    if ledObject is None or LED_COUNT is None:
+        return
+
+    budget = supportjson.readFromJSON("LED_STARTUP_BUDGET_MS")
+    if budget is not None:
+        LED_STARTUP_BUDGET_MS = max(int(budget), 0)
+    print("LED_STARTUP_BUDGET_MS set to", LED_STARTUP_BUDGET_MS)
+
+    _stop_animation()
+    _anim_step = -1
+    _anim_start_ms = ticks_ms()
+
+    if Timer is None:
+        # No timer support: play the same frames inline, still within budget.
+        while _anim_tick(None):
+            sleep_ms(_ANIM_FRAME_MS)
+        return
+
+    try:
+        _anim_timer = Timer(-1)
+        _anim_timer.init(mode=Timer.PERIODIC, period=_ANIM_FRAME_MS, callback=_anim_tick)
+    except Exception as e:
+        print("LED animation timer failed:", e)
+        _anim_timer = None
+        while _anim_tick(None):
+            sleep_ms(_ANIM_FRAME_MS)
+
+def startupAnimationRunning():
+    return _anim_timer is not None
+
+def _stop_animation():
+    global _anim_timer
+    timer = _anim_timer
+    _anim_timer = None
+    if timer is not None:
+        try:
+            timer.deinit()
+        except Exception:
+            pass
+
+def _anim_apply_step(step):
+    # Step 3*i + phase lights LED i in _ANIM_COLORS[phase]; the earlier LEDs
+    # were already left blue by their own last phase.
+    ledObject[step // 3] = _ANIM_COLORS[step % 3]
+
+def _anim_tick(_timer):
+    # Timer callback: catch up to wherever the clock says the animation
+    # should be, send one frame, and stop after the final fill.
+    global _anim_step
+
+    if _timer is not None and _anim_timer is None:
+        # A tick that was already queued when the animation was stopped.
+        return False
+    if ledObject is None:
+        _stop_animation()
+        return False
+
+    total = 3 * LED_COUNT
+    elapsed = ticks_diff(ticks_ms(), _anim_start_ms)
+    budget = LED_STARTUP_BUDGET_MS
+
+    if budget <= 0 or elapsed >= budget:
+        target = total
+    else:
+        target = elapsed * (total + 1) // budget
+
+    if target >= total:
+        _stop_animation()
+        brightness = LED_BRIGHTNESS if LED_BRIGHTNESS is not None else 100
+        ledObject.fill((0, 0, 255 * brightness // 100))
+        flush()
+        return False
+
+    step = _anim_step
+    while step < target:
+        step += 1
+        _anim_apply_step(step)
+    _anim_step = step
+    flush()
+    return True
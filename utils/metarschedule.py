@@ -0,0 +1,193 @@
+import utime
+import utils.jsonsupport as supportjson
+
+# Decides how long to wait before the next METAR fetch.
+#
+# Routine METARs come out once per station period (usually hourly, at the
+# same minute past the hour), and show up on aviationweather.gov a few
+# minutes after their obsTime. Instead of polling on a fixed interval, we
+# learn the period and that publication lag from the obsTimes we've seen,
+# poll densely around when the next one should appear, and back off in
+# between. A SPECI means conditions are changing, so polling stays tighter
+# for a while after one.
+
+#-----Schedule Config-----
+METAR_POLL_INTERVAL_S = 600     # used until the clock is synced / no history yet
+METAR_POLL_MIN_S = 60           # dense polling inside the expected window
+METAR_POLL_MAX_S = 900          # longest back-off between polls
+METAR_POLL_RETRY_S = 120        # after a failed fetch
+METAR_SPECI_POLL_S = 300        # cap while a SPECI is recent
+METAR_SPECI_HOLD_S = 3600       # how long a SPECI keeps polling tight
+
+_DEFAULT_PERIOD_S = 3600
+_MIN_PERIOD_S = 1200
+_MAX_PERIOD_S = 7200
+_DEFAULT_LAG_S = 240
+_WINDOW_BEFORE_S = 120          # start dense polling this early
+_WINDOW_AFTER_S = 900           # and give up on dense polling this late
+_HISTORY_LEN = 4
+
+# Anything before this (2023-11) means the RTC hasn't been set by NTP yet.
+_MIN_VALID_UNIX = 1700000000
+
+# Seconds between 1970-01-01 and 2000-01-01, for ports whose epoch is 2000.
+_EPOCH_2000_OFFSET = 946684800
+
+#-----Schedule Variables-----
+_routine_obs = []       # recent routine obsTimes, oldest first
+_last_obs = None        # newest obsTime of any type
+_lag_s = _DEFAULT_LAG_S
+_speci_until = 0
+_last_poll = None       # unix time of the previous fetch attempt
+_last_failed = False
+
+try:
+    _epoch_offset = _EPOCH_2000_OFFSET if utime.gmtime(0)[0] == 2000 else 0
+except Exception:
+    _epoch_offset = 0
+
+
+def unixNow():
+    """Current UTC time as Unix seconds (the epoch obsTime uses)."""
+    return utime.time() + _epoch_offset
+
+
+def startupSchedule():
+    """Load polling limits from config.json."""
+    global METAR_POLL_INTERVAL_S, METAR_POLL_MIN_S, METAR_POLL_MAX_S
+
+    value = supportjson.readFromJSON("METAR_POLL_INTERVAL_S")
+    if value is not None:
+        METAR_POLL_INTERVAL_S = int(value)
+    value = supportjson.readFromJSON("METAR_POLL_MIN_S")
+    if value is not None:
+        METAR_POLL_MIN_S = int(value)
+    value = supportjson.readFromJSON("METAR_POLL_MAX_S")
+    if value is not None:
+        METAR_POLL_MAX_S = int(value)
+
+    print(
+        "METAR Schedule - interval:", METAR_POLL_INTERVAL_S,
+        "min:", METAR_POLL_MIN_S,
+        "max:", METAR_POLL_MAX_S,
+    )
+
+
+def _newest(records):
+    # Newest observation across the returned stations: (obsTime, metarType).
+    best = None
+    best_type = None
+    for record in records:
+        try:
+            obs = int(record.get("obsTime"))
+        except Exception:
+            continue
+        if best is None or obs > best:
+            best = obs
+            best_type = record.get("metarType")
+    return best, best_type
+
+
+def _period_s():
+    # Shortest gap between routine reports we've seen; stations that report
+    # half-hourly show up as 1800 here.
+    period = None
+    for i in range(1, len(_routine_obs)):
+        gap = _routine_obs[i] - _routine_obs[i - 1]
+        if gap >= _MIN_PERIOD_S and (period is None or gap < period):
+            period = gap
+    if period is None:
+        return _DEFAULT_PERIOD_S
+    return min(period, _MAX_PERIOD_S)
+
+
+def recordFetch(records, now=None):
+    """Feed the result of a fetch (decoded records, or None on failure).
+
+    Returns True when it carried an observation we hadn't seen before.
+    """
+    global _last_obs, _lag_s, _speci_until, _last_poll, _last_failed
+
+    if now is None:
+        now = unixNow()
+    previous_poll = _last_poll
+    _last_poll = now
+
+    if not records:
+        _last_failed = True
+        return False
+    _last_failed = False
+
+    obs, metar_type = _newest(records)
+    if obs is None or (_last_obs is not None and obs <= _last_obs):
+        return False
+    _last_obs = obs
+
+    if metar_type == "SPECI":
+        _speci_until = now + METAR_SPECI_HOLD_S
+    else:
+        _routine_obs.append(obs)
+        if len(_routine_obs) > _HISTORY_LEN:
+            _routine_obs.pop(0)
+
+    # Only trust the lag when the previous poll was recent enough to bracket
+    # the moment the report appeared.
+    if (
+        now >= _MIN_VALID_UNIX
+        and previous_poll is not None
+        and now - previous_poll <= 2 * METAR_POLL_MIN_S
+        and previous_poll >= obs
+    ):
+        sample = now - obs
+        _lag_s = (3 * _lag_s + sample) // 4
+
+    return True
+
+
+def nextPollDelay(now=None):
+    """Seconds to wait before the next METAR fetch."""
+    if now is None:
+        now = unixNow()
+
+    if _last_failed:
+        return METAR_POLL_RETRY_S
+
+    if now < _MIN_VALID_UNIX:
+        return METAR_POLL_INTERVAL_S
+
+    if _routine_obs:
+        anchor = _routine_obs[-1]
+    elif _last_obs is not None:
+        anchor = _last_obs
+    else:
+        return METAR_POLL_INTERVAL_S
+
+    period = _period_s()
+
+    # Next report we haven't seen yet whose window isn't already over.
+    expected = anchor + period
+    while expected + _lag_s + _WINDOW_AFTER_S < now:
+        expected += period
+    available = expected + _lag_s
+
+    if now < available - _WINDOW_BEFORE_S:
+        delay = available - _WINDOW_BEFORE_S - now
+    else:
+        delay = METAR_POLL_MIN_S
+
+    limit = METAR_POLL_MAX_S
+    if now < _speci_until:
+        limit = min(limit, METAR_SPECI_POLL_S)
+
+    return max(METAR_POLL_MIN_S, min(delay, limit))
+
+
+def getScheduleState():
+    return {
+        "routine_obs": list(_routine_obs),
+        "last_obs": _last_obs,
+        "lag_s": _lag_s,
+        "period_s": _period_s(),
+        "speci_until": _speci_until,
+        "last_failed": _last_failed,
+    }
@@ -0,0 +1,68 @@
+import json
+import utils.jsonsupport as supportjson
+
+try:
+    import uos as os
+except Exception:
+    import os
+
+#-----Snapshot Config-----
+# Last good decoded METAR, kept on flash so a reboot can light the board
+# before WiFi, NTP and a fresh fetch have all completed.
+METAR_SNAPSHOT_FILE = "metar_snapshot.json"
+METAR_SNAPSHOT_TMP_FILE = METAR_SNAPSHOT_FILE + ".tmp"
+_SNAPSHOT_VERSION = 1
+
+#-----Snapshot Variables-----
+# What is currently on flash, so an unchanged poll doesn't rewrite it.
+_saved = None
+
+def saveSnapshot(records):
+    """Persist the decoded METAR records (the list get_metar_raw returns).
+
+    Written to a temp file and renamed into place so a power cut can't leave
+    a truncated snapshot. Skipped when the records match what is already
+    saved. Returns True if the snapshot on flash is now current.
+    """
+    global _saved
+
+    if not records or not isinstance(records, list):
+        return False
+    if records == _saved:
+        return True
+
+    try:
+        with open(METAR_SNAPSHOT_TMP_FILE, 'w') as snapshotFile:
+            json.dump({"v": _SNAPSHOT_VERSION, "metar": records}, snapshotFile)
+        supportjson.replaceFile(METAR_SNAPSHOT_TMP_FILE, METAR_SNAPSHOT_FILE)
+        _saved = records
+        return True
+    except Exception as e:
+        print("Error writing METAR snapshot:", e)
+        try:
+            os.remove(METAR_SNAPSHOT_TMP_FILE)
+        except Exception:
+            pass
+        return False
+
+def loadSnapshot():
+    """Return the saved METAR records, or None if there is no usable snapshot."""
+    global _saved
+
+    try:
+        with open(METAR_SNAPSHOT_FILE, 'r') as snapshotFile:
+            data = json.load(snapshotFile)
+    except OSError:
+        return None
+    except Exception as e:
+        print("Error reading METAR snapshot:", e)
+        return None
+
+    if not isinstance(data, dict) or data.get("v") != _SNAPSHOT_VERSION:
+        return None
+    records = data.get("metar")
+    if not records or not isinstance(records, list) or not isinstance(records[0], dict):
+        return None
+
+    _saved = records
+    return records
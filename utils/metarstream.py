@@ -0,0 +1,200 @@
+# Incremental parser for the aviationweather.gov METAR JSON response.
+#
+# The response is a JSON array with one object per station. Instead of
+# buffering and json.loads()-ing the whole body, feed() consumes socket chunks
+# as they arrive and keeps only the top-level scalar fields we were asked for,
+# so peak heap stays flat no matter how many stations (or how many cloud
+# layers, remarks, etc.) the payload contains.
+
+# Fields main.py actually uses (plus icaoId to tell stations apart, and
+# metarType so the poll scheduler can spot SPECIs).
+DEFAULT_FIELDS = ("icaoId", "obsTime", "metarType", "wdir", "wspd", "temp", "fltCat")
+
+_MAX_KEY_LEN = 32
+_MAX_VALUE_LEN = 96
+
+# Byte values used by the state machine.
+_QUOTE = 0x22      # "
+_BACKSLASH = 0x5C  # \
+_LBRACE = 0x7B     # {
+_RBRACE = 0x7D     # }
+_LBRACKET = 0x5B   # [
+_RBRACKET = 0x5D   # ]
+_COLON = 0x3A      # :
+_COMMA = 0x2C      # ,
+
+# What the parser expects next inside a station object (depth 2).
+_EXPECT_NONE = 0
+_EXPECT_KEY = 1
+_EXPECT_VALUE = 2
+
+# What the current string / scalar is being captured for.
+_CAPTURE_NONE = 0
+_CAPTURE_KEY = 1
+_CAPTURE_VALUE = 2
+
+
+def _is_space(b):
+    return b == 0x20 or b == 0x0A or b == 0x0D or b == 0x09
+
+
+def _scalar_value(text):
+    if text == "null":
+        return None
+    if text == "true":
+        return True
+    if text == "false":
+        return False
+    try:
+        if "." in text or "e" in text or "E" in text:
+            return float(text)
+        return int(text)
+    except Exception:
+        return None
+
+
+class MetarStreamParser:
+    def __init__(self, fields=None):
+        self.fields = tuple(fields) if fields else DEFAULT_FIELDS
+        self.records = []
+        self.valid = True     # False once the body is clearly not a METAR array
+        self.complete = False  # True once the top-level array is closed
+
+        self._started = False
+        self._depth = 0
+        self._in_str = False
+        self._esc = False
+        self._expect = _EXPECT_NONE
+        self._capture = _CAPTURE_NONE
+        self._in_scalar = False
+        # One fixed capture buffer, reused for every key and wanted value.
+        self._buf = bytearray(_MAX_VALUE_LEN)
+        self._len = 0
+        self._key = None
+        self._record = None
+
+    def _text(self):
+        return bytes(self._buf[: self._len]).decode("utf-8", "ignore")
+
+    def _append(self, b, limit):
+        if self._len < limit:
+            self._buf[self._len] = b
+            self._len += 1
+
+    def _finish_string(self):
+        text = self._text()
+        if self._capture == _CAPTURE_KEY:
+            self._key = text
+        elif self._capture == _CAPTURE_VALUE and self._record is not None:
+            self._record[self._key] = text
+        self._capture = _CAPTURE_NONE
+
+    def _finish_scalar(self):
+        if self._capture == _CAPTURE_VALUE and self._record is not None:
+            self._record[self._key] = _scalar_value(self._text())
+        self._capture = _CAPTURE_NONE
+        self._in_scalar = False
+
+    def _start_capture(self, kind):
+        self._capture = kind
+        self._len = 0
+
+    def feed(self, data):
+        """Consume the next chunk of the response body (bytes/bytearray/memoryview)."""
+        if not self.valid or self.complete:
+            return
+
+        for b in data:
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif b == _BACKSLASH:
+                    self._esc = True
+                    continue
+                elif b == _QUOTE:
+                    self._in_str = False
+                    if self._capture != _CAPTURE_NONE:
+                        self._finish_string()
+                    continue
+                if self._capture == _CAPTURE_KEY:
+                    self._append(b, _MAX_KEY_LEN)
+                elif self._capture == _CAPTURE_VALUE:
+                    self._append(b, _MAX_VALUE_LEN)
+                continue
+
+            if self._in_scalar:
+                if b == _COMMA or b == _RBRACE or b == _RBRACKET or _is_space(b):
+                    self._finish_scalar()
+                else:
+                    if self._capture != _CAPTURE_NONE:
+                        self._append(b, _MAX_VALUE_LEN)
+                    continue
+
+            if _is_space(b):
+                continue
+
+            if not self._started:
+                # The top level must be an array of station objects; anything
+                # else (an error object, HTML, ...) is not a METAR response.
+                if b != _LBRACKET:
+                    self.valid = False
+                    return
+                self._started = True
+                self._depth = 1
+                continue
+
+            depth = self._depth
+
+            if depth == 2 and self._expect == _EXPECT_VALUE:
+                self._expect = _EXPECT_NONE
+                wanted = self._key in self.fields
+                if b == _QUOTE:
+                    self._in_str = True
+                    if wanted:
+                        self._start_capture(_CAPTURE_VALUE)
+                    continue
+                if b != _LBRACE and b != _LBRACKET:
+                    self._in_scalar = True
+                    if wanted:
+                        self._start_capture(_CAPTURE_VALUE)
+                        self._append(b, _MAX_VALUE_LEN)
+                    continue
+                # Nested object/array values are skipped below.
+
+            if b == _QUOTE:
+                self._in_str = True
+                if depth == 2 and self._expect == _EXPECT_KEY:
+                    self._start_capture(_CAPTURE_KEY)
+                continue
+
+            if b == _LBRACE or b == _LBRACKET:
+                self._depth = depth + 1
+                if depth == 1 and b == _LBRACE:
+                    self._record = {}
+                    self._expect = _EXPECT_KEY
+                continue
+
+            if b == _RBRACE or b == _RBRACKET:
+                self._depth = depth - 1
+                if depth == 2 and self._record is not None:
+                    self.records.append(self._record)
+                    self._record = None
+                    self._expect = _EXPECT_NONE
+                elif depth == 1:
+                    self.complete = True
+                    return
+                continue
+
+            if depth == 2:
+                if b == _COLON:
+                    self._expect = _EXPECT_VALUE
+                elif b == _COMMA:
+                    self._expect = _EXPECT_KEY
+                    self._key = None
+
+    def result(self):
+        """Return the list of per-station records, or None if the body was not a
+        complete METAR array (including one cut off before its closing "]")."""
+        if not self.valid or not self.complete:
+            return None
+        return self.records
@@ -0,0 +1,112 @@
+# Per-request network phase timings, kept as rolling windows so slow fetches
+# can be pinned on DNS, TCP connect, TLS handshake, server time-to-first-byte
+# or the body transfer.
+#
+# utils/httpclient records into this for every request (blocking and asyncio),
+# so METAR fetches and the updater are both covered. From the REPL:
+#
+#   import utils.nettiming as nettiming
+#   nettiming.report()
+#
+# Timings are taken with ticks_us and reported in milliseconds.
+
+try:
+    import utime as time
+except Exception:
+    import time
+
+# Phases in the order they happen. On the asyncio path "connect" is the TCP
+# connect only: MicroPython defers the TLS handshake to the first write, so
+# "tls" there is the time to drain the request on a new connection (the
+# handshake plus a few hundred request bytes), and "ttfb" starts after it.
+PHASES = ("dns", "connect", "tls", "ttfb", "transfer", "total")
+
+# Samples kept per phase.
+WINDOW = 32
+
+_samples = {}
+_counts = {}
+_new_connections = 0
+_reused_connections = 0
+
+
+def ticks_us():
+    try:
+        return time.ticks_us()
+    except Exception:
+        return int(time.perf_counter() * 1000000)
+
+
+def elapsed_us(start_us):
+    try:
+        return time.ticks_diff(time.ticks_us(), start_us)
+    except Exception:
+        return ticks_us() - start_us
+
+
+def record(phase, us):
+    """Add one sample (microseconds) to a phase's rolling window."""
+    window = _samples.get(phase)
+    if window is None:
+        window = [0] * WINDOW
+        _samples[phase] = window
+        _counts[phase] = 0
+    n = _counts[phase]
+    window[n % WINDOW] = us
+    _counts[phase] = n + 1
+
+
+def record_connection(reused):
+    global _new_connections, _reused_connections
+    if reused:
+        _reused_connections += 1
+    else:
+        _new_connections += 1
+
+
+def phase_stats(phase):
+    """Rolling {n, min, avg, max, p95} in ms for one phase, or None if no samples."""
+    n = _counts.get(phase, 0)
+    if not n:
+        return None
+    kept = min(n, WINDOW)
+    values = sorted(_samples[phase][:kept])
+    p95 = values[min(kept - 1, (kept * 95 + 99) // 100 - 1)]
+    return {
+        "n": n,
+        "min": values[0] / 1000,
+        "avg": sum(values) / kept / 1000,
+        "max": values[-1] / 1000,
+        "p95": p95 / 1000,
+    }
+
+
+def stats():
+    """All phases that have samples, plus connection reuse counts."""
+    out = {}
+    for phase in PHASES:
+        s = phase_stats(phase)
+        if s is not None:
+            out[phase] = s
+    out["connections"] = {"new": _new_connections, "reused": _reused_connections}
+    return out
+
+
+def report():
+    """Print a timing table (REPL helper)."""
+    print("phase        n     min     avg     p95     max  (ms)")
+    for phase in PHASES:
+        s = phase_stats(phase)
+        if s is None:
+            continue
+        print("{:<8} {:>5} {:>7.1f} {:>7.1f} {:>7.1f} {:>7.1f}".format(
+            phase, s["n"], s["min"], s["avg"], s["p95"], s["max"]))
+    print("connections: new", _new_connections, "reused", _reused_connections)
+
+
+def reset():
+    global _new_connections, _reused_connections
+    _samples.clear()
+    _counts.clear()
+    _new_connections = 0
+    _reused_connections = 0
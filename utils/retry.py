@@ -0,0 +1,198 @@
+# Shared retry policy: exponential backoff with jitter, error classification
+# and an overall wall-clock deadline per operation.
+#
+# An operation is a function taking a Deadline. Each attempt should cap its
+# own socket timeouts with deadline.timeout_s(...), so DNS + connect + TLS +
+# read of one attempt can never run past the operation's budget, and the
+# whole operation (all attempts plus backoff sleeps) is bounded by
+# deadline_ms.
+
+try:
+    import utime as time
+except Exception:
+    import time
+
+try:
+    import urandom as random
+except Exception:
+    try:
+        import random
+    except Exception:
+        random = None
+
+try:
+    import uasyncio as asyncio
+except Exception:
+    try:
+        import asyncio
+    except Exception:
+        asyncio = None
+
+
+# OSError codes worth another attempt: timeouts, resets, unreachable, and
+# DNS lookup failures (lwIP reports those as small negative numbers).
+_RETRYABLE_ERRNOS = (
+    -110, 110,  # ETIMEDOUT
+    -104, 104,  # ECONNRESET
+    -103, 103,  # ECONNABORTED
+    -111, 111,  # ECONNREFUSED
+    -113, 113,  # EHOSTUNREACH
+    -128, 128,  # ENOTCONN
+    -116, 116,  # ESTALE / connection dropped
+    -2, -3,     # getaddrinfo: no such host / try again
+    11,         # EAGAIN
+)
+
+
+def _ticks_ms():
+    try:
+        return time.ticks_ms()
+    except Exception:
+        return int(time.time() * 1000)
+
+
+def _ticks_diff(a, b):
+    try:
+        return time.ticks_diff(a, b)
+    except Exception:
+        return a - b
+
+
+def _ticks_add(a, b):
+    try:
+        return time.ticks_add(a, b)
+    except Exception:
+        return a + b
+
+
+def _sleep_ms(ms):
+    try:
+        time.sleep_ms(ms)
+    except Exception:
+        time.sleep(ms / 1000.0)
+
+
+def _random_fraction():
+    # 0.0 .. 1.0 for jitter; falls back to the clock if there is no RNG.
+    try:
+        return random.getrandbits(16) / 65535
+    except Exception:
+        return (_ticks_ms() % 1000) / 1000
+
+
+class RetryableError(Exception):
+    """Raise from an attempt to ask for a retry (e.g. HTTP 5xx)."""
+    pass
+
+
+class DeadlineExceeded(OSError):
+    pass
+
+
+class Deadline:
+    def __init__(self, budget_ms):
+        self.budget_ms = budget_ms
+        self._start = _ticks_ms()
+        self._end = None if budget_ms is None else _ticks_add(self._start, budget_ms)
+
+    def remaining_ms(self):
+        if self._end is None:
+            return None
+        return max(0, _ticks_diff(self._end, _ticks_ms()))
+
+    def expired(self):
+        return self._end is not None and self.remaining_ms() <= 0
+
+    def elapsed_ms(self):
+        return _ticks_diff(_ticks_ms(), self._start)
+
+    def timeout_s(self, wanted_s):
+        """wanted_s capped to what is left of the deadline (at least 0.5 s)."""
+        remaining = self.remaining_ms()
+        if remaining is None:
+            return wanted_s
+        return max(0.5, min(wanted_s, remaining / 1000))
+
+
+def is_retryable(e):
+    """Classify an exception: True for transient network trouble."""
+    if isinstance(e, RetryableError):
+        return True
+    if isinstance(e, (MemoryError, DeadlineExceeded)):
+        return False
+    if asyncio is not None and isinstance(e, getattr(asyncio, "TimeoutError", ())):
+        return True
+    if isinstance(e, OSError):
+        code = e.args[0] if e.args else None
+        if code in _RETRYABLE_ERRNOS:
+            return True
+        # Protocol errors from a half-dead connection (no errno).
+        return not isinstance(code, int)
+    return False
+
+
+class RetryPolicy:
+    """How often, how fast and for how long to retry one kind of operation."""
+
+    def __init__(self, name, attempts=3, base_ms=250, max_ms=4000, factor=2, jitter=0.5, deadline_ms=None):
+        self.name = name
+        self.attempts = attempts
+        self.base_ms = base_ms
+        self.max_ms = max_ms
+        self.factor = factor
+        self.jitter = jitter
+        self.deadline_ms = deadline_ms
+
+    def backoff_ms(self, attempt):
+        # Delay after the given (1-based) failed attempt, with +/- jitter.
+        delay = self.base_ms * (self.factor ** (attempt - 1))
+        delay = min(delay, self.max_ms)
+        if self.jitter:
+            delay = delay * (1 - self.jitter + 2 * self.jitter * _random_fraction())
+        return int(delay)
+
+    def _next_delay(self, attempt, e, deadline):
+        # Backoff before the next attempt, or None to give up and re-raise.
+        if attempt >= self.attempts or not is_retryable(e):
+            return None
+        delay = self.backoff_ms(attempt)
+        remaining = deadline.remaining_ms()
+        if remaining is not None and delay >= remaining:
+            return None
+        print("{}: attempt {} failed ({}); retrying in {} ms".format(self.name, attempt, e, delay))
+        return delay
+
+    def call(self, fn):
+        """Run fn(deadline) until it returns, retrying transient errors."""
+        deadline = Deadline(self.deadline_ms)
+        attempt = 0
+        while True:
+            attempt += 1
+            if deadline.expired():
+                raise DeadlineExceeded("{} deadline".format(self.name))
+            try:
+                return fn(deadline)
+            except Exception as e:
+                delay = self._next_delay(attempt, e, deadline)
+                if delay is None:
+                    raise
+            _sleep_ms(delay)
+
+    async def acall(self, fn):
+        """Async version of call(): fn(deadline) is a coroutine function."""
+        deadline = Deadline(self.deadline_ms)
+        attempt = 0
+        while True:
+            attempt += 1
+            if deadline.expired():
+                raise DeadlineExceeded("{} deadline".format(self.name))
+            try:
+                remaining = deadline.remaining_ms()
+                if remaining is None:
+                    return await fn(deadline)
+                return await asyncio.wait_for(fn(deadline), remaining / 1000)
+            except Exception as e:
+                delay = self._next_delay(attempt, e, deadline)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay / 1000)
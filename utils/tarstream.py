@@ -0,0 +1,198 @@
+# Streaming reader for update bundles: a ustar archive, optionally
+# zlib-compressed, read straight off an HTTP response (or anything else with
+# readinto()). Entries are handed out one at a time and read in caller-sized
+# chunks, so memory use is one 512-byte header block plus the decompressor
+# window, whatever the size of the bundle.
+#
+#   tar = tarstream.TarReader(resp, tarstream.COMPRESSION_ZLIB)
+#   while True:
+#       entry = tar.next()          # (name, size) or None at the end
+#       if entry is None:
+#           break
+#       n = tar.readinto(buf)       # entry data; 0 once it is used up
+
+try:
+    import io
+    _IOBase = io.IOBase
+except Exception:
+    _IOBase = object
+
+try:
+    import deflate
+except Exception:
+    deflate = None
+
+try:
+    import zlib
+except Exception:
+    try:
+        import uzlib as zlib
+    except Exception:
+        zlib = None
+
+BLOCK = 512
+
+COMPRESSION_NONE = "none"
+COMPRESSION_ZLIB = "zlib"
+
+# Bundles are compressed with a 1 KiB window (tools/make_manifest.py), which
+# is all the decompressor has to keep around on the board.
+ZLIB_WBITS = 10
+
+_TYPE_FILE = (0, 0x30)   # NUL (old tar) or "0"
+
+
+class TarError(Exception):
+    pass
+
+
+class _Stream(_IOBase):
+    # The C decompressors want a stream object; this gives them one over
+    # anything that has readinto().
+    def __init__(self, src):
+        self._src = src
+
+    def readinto(self, buf):
+        return self._src.readinto(buf)
+
+
+class _ZlibReader:
+    # Fallback for builds without DeflateIO/DecompIO (and the host).
+    def __init__(self, src, chunk=BLOCK):
+        self._src = src
+        self._d = zlib.decompressobj()
+        self._in = bytearray(chunk)
+        self._in_mv = memoryview(self._in)
+        self._tail = b""
+        self._eof = False
+
+    def readinto(self, mv):
+        want = len(mv)
+        while True:
+            if self._tail:
+                out = self._d.decompress(self._tail, want)
+                self._tail = self._d.unconsumed_tail
+            elif self._eof:
+                return 0
+            else:
+                n = self._src.readinto(self._in_mv)
+                if not n:
+                    self._eof = True
+                    out = self._d.flush()
+                    if len(out) > want:
+                        raise TarError("decompressor overrun")
+                else:
+                    out = self._d.decompress(bytes(self._in_mv[:n]), want)
+                    self._tail = self._d.unconsumed_tail
+            if out:
+                mv[: len(out)] = out
+                return len(out)
+
+
+def _open_stream(src, compression):
+    if not compression or compression == COMPRESSION_NONE:
+        return src
+    if compression != COMPRESSION_ZLIB:
+        raise TarError("unsupported compression: {}".format(compression))
+    if deflate is not None:
+        return deflate.DeflateIO(_Stream(src), deflate.ZLIB, ZLIB_WBITS)
+    if zlib is not None and hasattr(zlib, "DecompIO"):
+        return zlib.DecompIO(_Stream(src), ZLIB_WBITS)
+    if zlib is not None and hasattr(zlib, "decompressobj"):
+        return _ZlibReader(src)
+    raise TarError("no zlib decompressor")
+
+
+def _field(buf, start, length):
+    end = start
+    stop = start + length
+    while end < stop and buf[end] != 0:
+        end += 1
+    return bytes(buf[start:end]).decode("utf-8", "ignore")
+
+
+def _octal(buf, start, length):
+    text = _field(buf, start, length).strip()
+    return int(text, 8) if text else 0
+
+
+def _checksum_ok(buf):
+    # The checksum field itself counts as eight spaces.
+    total = 8 * 0x20
+    for i in range(BLOCK):
+        if i < 148 or i >= 156:
+            total += buf[i]
+    return total == _octal(buf, 148, 8)
+
+
+class TarReader:
+    def __init__(self, src, compression=None):
+        self._src = _open_stream(src, compression)
+        self._buf = bytearray(BLOCK)
+        self._mv = memoryview(self._buf)
+        self._left = 0      # data bytes of the current entry not read yet
+        self._pad = 0       # padding after it, up to the next 512-byte block
+        self._done = False
+
+    def _read_exact(self, mv):
+        got = 0
+        size = len(mv)
+        while got < size:
+            n = self._src.readinto(mv[got:])
+            if not n:
+                raise TarError("truncated bundle")
+            got += n
+
+    def _discard(self, count):
+        while count > 0:
+            n = min(count, BLOCK)
+            self._read_exact(self._mv[:n])
+            count -= n
+
+    def next(self):
+        """Advance to the next regular file: (name, size), or None at the end."""
+        while not self._done:
+            self._discard(self._left + self._pad)
+            self._left = 0
+            self._pad = 0
+
+            self._read_exact(self._mv)
+            buf = self._buf
+            if buf[0] == 0:
+                # Zero block: end of archive.
+                self._done = True
+                break
+            if not _checksum_ok(buf):
+                raise TarError("bad header checksum")
+
+            size = _octal(buf, 124, 12)
+            self._left = size
+            self._pad = (BLOCK - size % BLOCK) % BLOCK
+
+            if buf[156] not in _TYPE_FILE:
+                # Directories, pax/GNU extension headers: skip their data.
+                continue
+
+            name = _field(buf, 0, 100)
+            if bytes(buf[257:262]) == b"ustar":
+                prefix = _field(buf, 345, 155)
+                if prefix:
+                    name = prefix + "/" + name
+            while name.startswith("./"):
+                name = name[2:]
+            return name, size
+        return None
+
+    def readinto(self, mv):
+        """Read the current entry's data; returns the count, 0 once it is used up."""
+        if self._left <= 0:
+            return 0
+        if not isinstance(mv, memoryview):
+            # Slicing a bytearray would read into a copy.
+            mv = memoryview(mv)
+        n = min(len(mv), self._left)
+        count = self._src.readinto(mv[:n])
+        if not count:
+            raise TarError("truncated bundle")
+        self._left -= count
+        return count
@@ -0,0 +1,351 @@
+import json
+import machine
+
+try:
+    import uos as os
+except Exception:
+    import os
+
+try:
+    import micropython
+except Exception:
+    micropython = None
+
+try:
+    from machine import Timer
+except Exception:
+    Timer = None
+
+import utils.jsonsupport as supportjson
+
+# A/B activation for updates.
+#
+# updates.run_update downloads and verifies every changed file into
+# STAGE_DIR first, so a failed download never touches the running code.
+# activate() then swaps the staged files in (the old copies go to PREV_DIR)
+# under a journal, and the new set runs "on trial": if it crashes, hangs or
+# keeps rebooting before main.py's first METAR fetch attempt (successful or
+# not, so a board without internet keeps a healthy build), the previous set
+# is moved back. A power cut during the swap is rolled back by boot.py.
+#
+# Until activation, update_progress.json records the digest each path in
+# STAGE_DIR is being fetched for. It is written once per update run, before
+# any download starts (and not at all when a resumed run wants the same
+# content), so whatever a cut-short run left behind can be trusted by the
+# next one: a staged file (only renamed into place once verified) is reused,
+# and a partial .tmp download resumes with a Range request from its size.
+#
+# Journal states:
+#   activating - swap in progress; anything in PREV_DIR is an old live file
+#   trial      - new files are live, waiting for confirmBoot()
+
+#-----Update Journal Config-----
+STAGE_DIR = "update_stage"
+PREV_DIR = "update_prev"
+JOURNAL_FILE = "update_journal.json"
+JOURNAL_TMP_FILE = JOURNAL_FILE + ".tmp"
+PROGRESS_FILE = "update_progress.json"
+PROGRESS_TMP_FILE = PROGRESS_FILE + ".tmp"
+
+UPDATE_TRIAL_BOOTS = 3          # unconfirmed boots before rolling back
+UPDATE_TRIAL_TIMEOUT_S = 900    # time main.py gets to reach its first fetch
+
+STATE_ACTIVATING = "activating"
+STATE_TRIAL = "trial"
+
+#-----Update Journal Variables-----
+_journal = None
+_journal_loaded = False
+_trial_timer = None
+_progress = None
+
+
+def _exists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+
+def _is_dir(path):
+    try:
+        return (os.stat(path)[0] & 0x4000) != 0
+    except OSError:
+        return False
+
+
+def _ensure_dirs_for_file(path):
+    parts = path.split("/")[:-1]
+    cur = ""
+    for p in parts:
+        if not p:
+            continue
+        cur = p if cur == "" else cur + "/" + p
+        try:
+            os.mkdir(cur)
+        except OSError:
+            pass
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _remove_tree(path):
+    if not _is_dir(path):
+        _remove(path)
+        return
+    for name in os.listdir(path):
+        _remove_tree(path + "/" + name)
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
+
+
+def _move(src, dest):
+    _ensure_dirs_for_file(dest)
+    _remove(dest)
+    os.rename(src, dest)
+
+
+def _read_journal():
+    global _journal, _journal_loaded
+
+    _journal_loaded = True
+    try:
+        with open(JOURNAL_FILE, "r") as f:
+            data = json.load(f)
+        _journal = data if isinstance(data, dict) else None
+    except Exception:
+        _journal = None
+    return _journal
+
+
+def _write_journal(data):
+    global _journal, _journal_loaded
+
+    with open(JOURNAL_TMP_FILE, "w") as f:
+        json.dump(data, f)
+    supportjson.replaceFile(JOURNAL_TMP_FILE, JOURNAL_FILE)
+    _journal = data
+    _journal_loaded = True
+
+
+def _clear_journal():
+    global _journal, _journal_loaded
+
+    _remove(JOURNAL_FILE)
+    _remove(JOURNAL_TMP_FILE)
+    _journal = None
+    _journal_loaded = True
+
+
+def _get_journal():
+    if _journal_loaded:
+        return _journal
+    return _read_journal()
+
+
+def stagePath(relpath):
+    return STAGE_DIR + "/" + relpath
+
+
+def clearStage():
+    global _progress
+
+    _remove_tree(STAGE_DIR)
+    _remove(PROGRESS_FILE)
+    _remove(PROGRESS_TMP_FILE)
+    _progress = None
+
+
+def _load_progress():
+    global _progress
+
+    if _progress is None:
+        try:
+            with open(PROGRESS_FILE, "r") as f:
+                data = json.load(f)
+        except Exception:
+            data = None
+        staging = data.get("staging") if isinstance(data, dict) else None
+        _progress = staging if isinstance(staging, dict) else {}
+    return _progress
+
+
+def stagedDigest(path):
+    """Digest the STAGE_DIR copy (or partial download) of path was fetched for, or None."""
+    return _load_progress().get(path)
+
+
+def recordStaging(digests):
+    """Record the {path: digest} an update run is about to fetch into STAGE_DIR.
+
+    The caller first removes staged files that belong to other content.
+    Nothing is written if the journal already says the same.
+    """
+    global _progress
+
+    if digests == _load_progress():
+        return
+    with open(PROGRESS_TMP_FILE, "w") as f:
+        json.dump({"staging": digests}, f)
+    supportjson.replaceFile(PROGRESS_TMP_FILE, PROGRESS_FILE)
+    _progress = dict(digests)
+
+
+def inTrial():
+    journal = _get_journal()
+    return journal is not None and journal.get("state") == STATE_TRIAL
+
+
+def activate(files, removes=None):
+    """Swap the staged files in and start a trial.
+
+    files are repo-relative paths already verified in STAGE_DIR, in the order
+    they should go live; removes are live files the new set replaces under
+    another name (a .py superseded by its .mpy). Returns True on success; on
+    failure everything that was swapped is put back.
+    """
+    _remove_tree(PREV_DIR)
+    removes = [p for p in (removes or []) if _exists(p)]
+    new_files = [p for p in files if not _exists(p)]
+
+    # Written before anything moves, so boot.py can undo a half-done swap.
+    journal = {"v": 1, "state": STATE_ACTIVATING, "files": files, "new": new_files, "removed": removes}
+    _write_journal(journal)
+
+    try:
+        for path in files:
+            if path not in new_files:
+                _move(path, PREV_DIR + "/" + path)
+            _move(stagePath(path), path)
+        for path in removes:
+            _move(path, PREV_DIR + "/" + path)
+    except Exception as e:
+        print("Update activation failed:", e)
+        rollback()
+        return False
+
+    journal = dict(journal)
+    journal["state"] = STATE_TRIAL
+    journal["boots"] = 0
+    _write_journal(journal)
+    clearStage()
+    print("Update activated:", len(files), "files,", len(removes), "removed, on trial")
+    return True
+
+
+def rollback():
+    """Put the previous files back. Safe to repeat after a power cut."""
+    journal = _get_journal()
+    if journal is None:
+        return False
+
+    print("Rolling back update from state:", journal.get("state"))
+    new_files = journal.get("new") or []
+    for path in (journal.get("files") or []) + (journal.get("removed") or []):
+        prev_path = PREV_DIR + "/" + path
+        try:
+            if _exists(prev_path):
+                _move(prev_path, path)
+            elif path in new_files:
+                _remove(path)
+        except Exception as e:
+            print("Rollback failed for", path, e)
+
+    _remove_tree(PREV_DIR)
+    clearStage()
+    _clear_journal()
+    _cancel_trial_timer()
+    return True
+
+
+def _cancel_trial_timer():
+    global _trial_timer
+
+    if _trial_timer is not None:
+        try:
+            _trial_timer.deinit()
+        except Exception:
+            pass
+        _trial_timer = None
+
+
+def _trial_expired(_):
+    print("Update trial timed out before the first METAR fetch")
+    rollback()
+    machine.reset()
+
+
+def _on_trial_timer(_):
+    # Timer callbacks can run in interrupt context; do the file work in the
+    # scheduler.
+    if micropython is not None:
+        micropython.schedule(_trial_expired, None)
+    else:
+        _trial_expired(None)
+
+
+def _arm_trial_timer():
+    global _trial_timer
+
+    if Timer is None:
+        return
+    try:
+        _trial_timer = Timer(-1)
+        _trial_timer.init(mode=Timer.ONE_SHOT, period=UPDATE_TRIAL_TIMEOUT_S * 1000, callback=_on_trial_timer)
+    except Exception as e:
+        print("Update trial timer unavailable:", e)
+        _trial_timer = None
+
+
+def bootCheck():
+    """Run from boot.py, before main.py imports anything else."""
+    global UPDATE_TRIAL_BOOTS, UPDATE_TRIAL_TIMEOUT_S
+
+    journal = _read_journal()
+    if journal is None:
+        return None
+
+    state = journal.get("state")
+    if state != STATE_TRIAL:
+        # Power was lost mid-swap (or the journal is from something newer).
+        rollback()
+        return "rolled_back"
+
+    value = supportjson.readFromJSON("UPDATE_TRIAL_BOOTS")
+    if value is not None:
+        UPDATE_TRIAL_BOOTS = int(value)
+    value = supportjson.readFromJSON("UPDATE_TRIAL_TIMEOUT_S")
+    if value is not None:
+        UPDATE_TRIAL_TIMEOUT_S = int(value)
+
+    boots = int(journal.get("boots") or 0) + 1
+    if boots > UPDATE_TRIAL_BOOTS:
+        print("Update never confirmed after", boots - 1, "boots")
+        rollback()
+        return "rolled_back"
+
+    journal = dict(journal)
+    journal["boots"] = boots
+    _write_journal(journal)
+    _arm_trial_timer()
+    print("Update trial boot", boots, "of", UPDATE_TRIAL_BOOTS)
+    return "trial"
+
+
+def confirmBoot():
+    """Called once main.py has made its first METAR fetch attempt: keep the new files."""
+    if not inTrial():
+        return False
+    _cancel_trial_timer()
+    _remove_tree(PREV_DIR)
+    _clear_journal()
+    print("Update confirmed")
+    return True
@@ -2,11 +2,12 @@ import utils.jsonsupport as supportjson
 from utime import sleep
 import network
 import utils.i2cdisplay as DisplayI2C
+from utils.metarstream import MetarStreamParser
 import gc
 import socket
-import ssl
+import utils.httpclient as httpclient
+import utils.retry as retry
 import utime
-import json
 
 try:
     import machine
@@ -18,6 +19,19 @@ try:
 except Exception:
     ntptime = None
 
+try:
+    import uhashlib as hashlib
+except Exception:
+    try:
+        import hashlib
+    except Exception:
+        hashlib = None
+
+try:
+    import uasyncio as asyncio
+except Exception:
+    import asyncio
+
 
 #-----Wifi Config-----
 WIFI_SSID = None
@@ -34,6 +48,10 @@ WIFI_AP_PASSWORD = None
 WIFI_WAIT_AFTER_SUBMIT_S = None
 ap_server_socket = None
 
+# Receive buffer for portal requests, allocated on first use and kept.
+_AP_RX_BUF_SIZE = 4096
+_ap_rx_buf = None
+
 # Cache scan results to avoid repeated scans per refresh.
 _ap_last_scan_ssids = None
 _ap_last_scan_ms = 0
@@ -241,39 +259,67 @@ def _ap_parse_post_body(body):
     return params
 
 
-def _ap_read_http_request(cl, timeout_s=3, max_bytes=4096):
+def _ap_find_header_end(buf, n):
+    # Index just past the blank line ending the headers, or -1.
+    for i in range(3, n):
+        if buf[i] == 0x0A and buf[i - 1] == 0x0D and buf[i - 2] == 0x0A and buf[i - 3] == 0x0D:
+            return i + 1
+    return -1
+
+
+def _ap_content_length(buf, header_end):
+    try:
+        header_text = bytes(buf[:header_end]).decode('latin-1')
+        for line in header_text.split('\r\n'):
+            if line.lower().startswith('content-length:'):
+                return int(line.split(':', 1)[1].strip())
+    except Exception:
+        pass
+    return 0
+
+
+def _ap_read_http_request(cl, timeout_s=3, max_bytes=_AP_RX_BUF_SIZE):
+    global _ap_rx_buf
+
     try:
         cl.settimeout(timeout_s)
     except Exception:
         pass
 
-    data = b""
+    # Receive into one reusable buffer instead of concatenating chunks.
+    if _ap_rx_buf is None:
+        _ap_rx_buf = bytearray(_AP_RX_BUF_SIZE)
+    buf = _ap_rx_buf
+    mv = memoryview(buf)
+    max_bytes = min(max_bytes, len(buf))
+
+    n = 0
+    header_end = -1
+    need = 0
     try:
-        while len(data) < max_bytes:
-            chunk = cl.recv(512)
-            if not chunk:
+        while n < max_bytes:
+            try:
+                got = cl.readinto(mv[n:max_bytes])
+            except AttributeError:
+                got = cl.recv_into(mv[n:max_bytes])
+            if not got:
                 break
-            data += chunk
-            if b"\r\n\r\n" in data:
+            scan_from = max(0, n - 3)
+            n += got
+            if header_end == -1:
+                end = _ap_find_header_end(mv[scan_from:n], n - scan_from)
+                if end == -1:
+                    continue
                 # headers received; body may already be included
                 # If Content-Length exists and body incomplete, keep reading.
-                try:
-                    header, body = data.split(b"\r\n\r\n", 1)
-                    header_text = header.decode('latin-1')
-                    clen = 0
-                    for line in header_text.split('\r\n'):
-                        if line.lower().startswith('content-length:'):
-                            clen = int(line.split(':', 1)[1].strip())
-                            break
-                    if clen and len(body) < clen:
-                        continue
-                except Exception:
-                    pass
+                header_end = scan_from + end
+                need = header_end + _ap_content_length(buf, header_end)
+            if n >= need:
                 break
     except Exception:
         return None
 
-    return data if data else None
+    return bytes(mv[:n]) if n else None
 
 
 def _ap_send(cl, payload):
@@ -293,12 +339,11 @@ def _save_wifi_config(ssid, password):
     # Blank SSID means "no SSID configured".
     if ssid is None:
         ssid = ""
-    supportjson.writeToJSON("WIFI_SSID", ssid)
     # Always overwrite password on explicit "Save WiFi".
     # Blank password means open network / no password.
     if password is None:
         password = ""
-    supportjson.writeToJSON("WIFI_PASSWORD", password)
+    supportjson.writeManyToJSON({"WIFI_SSID": ssid, "WIFI_PASSWORD": password})
 
 
 def _parse_int_in_range(value, min_value=0, max_value=100):
@@ -320,13 +365,18 @@ def _parse_int_in_range(value, min_value=0, max_value=100):
 
 
 def _save_board_config(led_brightness, crosswind_threshold):
+    changes = {}
+
     led = _parse_int_in_range(led_brightness, 0, 100)
     if led is not None:
-        supportjson.writeToJSON("LED_BRIGHTNESS", led)
+        changes["LED_BRIGHTNESS"] = led
 
     cross = _parse_int_in_range(crosswind_threshold, 0, 100)
     if cross is not None:
-        supportjson.writeToJSON("CROSSWIND_THRESHOLD_KTS", cross)
+        changes["CROSSWIND_THRESHOLD_KTS"] = cross
+
+    if changes:
+        supportjson.writeManyToJSON(changes)
 
 
 def _render_wifi_form():
@@ -499,13 +549,15 @@ def startupAccessPointConfigPortal():
     # OLED instructions
     try:
         DisplayI2C.displayClear()
-        DisplayI2C.display_row0 = "WiFi AP Mode"
-        DisplayI2C.display_row2 = "SSID"
-        DisplayI2C.display_row3 = WIFI_AP_SSID
-        DisplayI2C.display_row4 = "PASSWORD"
-        DisplayI2C.display_row5 = WIFI_AP_PASSWORD
-        DisplayI2C.display_row6 = "Open Browser To:"
-        DisplayI2C.display_row7 = "192.168.4.1"
+        DisplayI2C.set_rows({
+            0: "WiFi AP Mode",
+            2: "SSID",
+            3: WIFI_AP_SSID,
+            4: "PASSWORD",
+            5: WIFI_AP_PASSWORD,
+            6: "Open Browser To:",
+            7: "192.168.4.1",
+        })
         DisplayI2C.displayRefresh()
     except Exception:
         pass
@@ -723,6 +775,10 @@ def startupAccessPointConfigPortal():
 # ----- Time Sync (NTP) -----
 NTP_HOST = None
 NTP_RETRIES = None
+NTP_TIMEOUT_S = 2
+NTP_RETRY = retry.RetryPolicy("NTP", attempts=3, base_ms=300, max_ms=2000, deadline_ms=8000)
+# Between rounds of NTP_RETRY when the async sync keeps failing.
+NTP_BACKOFF = retry.RetryPolicy("NTP sync", base_ms=30000, max_ms=900000)
 _time_synced = False
 
 
@@ -769,15 +825,9 @@ def resetWifi():
     print("WiFi reset: complete")
 
 
-def sync_time_ntp(force=False):
-    """Sync device RTC to UTC using NTP.
-
-    Returns True on success, False otherwise.
-    """
-    global NTP_HOST, NTP_RETRIES, _time_synced
-
-    if _time_synced and not force:
-        return True
+def _ntp_config():
+    # Load NTP settings once; False when there is no ntptime to sync with.
+    global NTP_HOST, NTP_RETRIES
 
     if ntptime is None:
         print("NTP sync skipped: ntptime not available")
@@ -797,19 +847,69 @@ def sync_time_ntp(force=False):
     except Exception:
         pass
 
-    for attempt in range(1, NTP_RETRIES + 1):
-        try:
-            print("NTP sync attempt", attempt, "host=", NTP_HOST)
-            ntptime.settime()  # sets RTC to UTC
-            _time_synced = True
-            now = utime.gmtime()
-            print("NTP synced UTC:", "{:02d}:{:02d}:{:02d}Z".format(now[3], now[4], now[5]))
-            return True
-        except Exception as e:
-            print("NTP sync failed:", e)
-            _sleep_ms(300)
+    NTP_RETRY.attempts = NTP_RETRIES
+    return True
 
-    return False
+
+def _ntp_attempt(deadline, attempt):
+    global _time_synced
+    attempt[0] += 1
+    print("NTP sync attempt", attempt[0], "host=", NTP_HOST)
+    try:
+        ntptime.timeout = deadline.timeout_s(NTP_TIMEOUT_S)
+    except Exception:
+        pass
+    ntptime.settime()  # sets RTC to UTC
+    _time_synced = True
+    now = utime.gmtime()
+    print("NTP synced UTC:", "{:02d}:{:02d}:{:02d}Z".format(now[3], now[4], now[5]))
+
+
+def timeSynced():
+    """True once the RTC has been set from NTP (until the next resetWifi())."""
+    return _time_synced
+
+
+def sync_time_ntp(force=False):
+    """Sync device RTC to UTC using NTP.
+
+    Returns True on success, False otherwise.
+    """
+    if _time_synced and not force:
+        return True
+    if not _ntp_config():
+        return False
+
+    attempt = [0]
+    try:
+        NTP_RETRY.call(lambda deadline: _ntp_attempt(deadline, attempt))
+        return True
+    except Exception as e:
+        print("NTP sync failed:", e)
+        return False
+
+
+async def sync_time_ntp_async(force=False):
+    """sync_time_ntp() for an asyncio task: the backoff between attempts
+    yields to the other tasks. Each attempt still blocks for up to
+    NTP_TIMEOUT_S, as ntptime has no non-blocking API.
+    """
+    if _time_synced and not force:
+        return True
+    if not _ntp_config():
+        return False
+
+    attempt = [0]
+
+    async def _attempt(deadline):
+        _ntp_attempt(deadline, attempt)
+
+    try:
+        await NTP_RETRY.acall(_attempt)
+        return True
+    except Exception as e:
+        print("NTP sync failed:", e)
+        return False
 
 
 # ----- METAR Config (aviationweather.gov / NOAA) -----
@@ -820,15 +920,48 @@ METAR_PORT = 443
 METAR_STATION_ID = None  # e.g. "KSLC" or "KSLC,KBTF"
 METAR_SOCKET_TIMEOUT_S = 10
 METAR_FETCH_RETRIES = 3
+METAR_DEADLINE_S = 45   # upper bound for one whole fetch, retries included
+METAR_RETRY = retry.RetryPolicy("METAR", attempts=METAR_FETCH_RETRIES, base_ms=500, max_ms=4000, deadline_ms=METAR_DEADLINE_S * 1000)
+METAR_FIELDS = None  # fields kept per station; None = metarstream.DEFAULT_FIELDS
+
+# Validators and result of the last 200 response, so the next poll can ask
+# "has it changed?" (If-None-Match / If-Modified-Since) and a 304 can reuse
+# the decoded records.
+_metar_cache_path = None
+_metar_etag = None
+_metar_last_modified = None
+_metar_digest = None
+_metar_records = None
+
+# How the last get_metar_async() call went; main.py uses it to skip
+# redrawing an observation that is already on the board.
+#   not_modified: server answered 304
+#   unchanged:    same body (or 304) as the previous successful fetch
+metarFetchInfo = {"status": None, "not_modified": False, "unchanged": False}
 
 
 def startupMetar():
     """Load METAR settings from config.json."""
-    global METAR_STATION_ID, METAR_SOCKET_TIMEOUT_S, METAR_FETCH_RETRIES
+    global METAR_STATION_ID, METAR_SOCKET_TIMEOUT_S, METAR_FETCH_RETRIES, METAR_FIELDS
+    global METAR_DEADLINE_S
 
     if METAR_STATION_ID is None:
         METAR_STATION_ID = supportjson.readFromJSON("METAR_STATION_ID")
 
+    retries = supportjson.readFromJSON("METAR_FETCH_RETRIES")
+    if retries is not None:
+        METAR_FETCH_RETRIES = int(retries)
+        METAR_RETRY.attempts = METAR_FETCH_RETRIES
+    deadline_s = supportjson.readFromJSON("METAR_DEADLINE_S")
+    if deadline_s is not None:
+        METAR_DEADLINE_S = int(deadline_s)
+        METAR_RETRY.deadline_ms = METAR_DEADLINE_S * 1000
+
+    if METAR_FIELDS is None:
+        fields = supportjson.readFromJSON("METAR_FIELDS")
+        if isinstance(fields, list) and fields:
+            METAR_FIELDS = fields
+
     print(
         "METAR Config - Stations:",
         METAR_STATION_ID,
@@ -842,12 +975,11 @@ def _sleep_ms(ms):
         utime.sleep(ms / 1000.0)
 
 
-def _wrap_tls(sock, host):
-    """Wrap a socket for TLS in a way that works across firmware."""
+async def _asleep_ms(ms):
     try:
-        return ssl.wrap_socket(sock, server_hostname=host)
-    except Exception:
-        return ssl.wrap_socket(sock)
+        await asyncio.sleep_ms(ms)
+    except AttributeError:
+        await asyncio.sleep(ms / 1000.0)
 
 
 def _format_station_ids(station_ids):
@@ -858,142 +990,137 @@ def _format_station_ids(station_ids):
     return str(station_ids)
 
 
-def get_metar_raw(station_ids=None):
-    """Fetch METAR JSON via raw TLS socket.
+async def get_metar_async(station_ids=None):
+    """Fetch METAR JSON over HTTPS without blocking other asyncio tasks.
 
-    Retries on transient timeouts (often reported as -110 in MicroPython).
-    Uses list+join buffering to reduce heap fragmentation.
+    Transient failures are retried with backoff under METAR_RETRY, and the
+    whole fetch (all attempts) is bounded by METAR_DEADLINE_S. The body is
+    streamed through MetarStreamParser, so only the configured fields of each
+    station are kept in RAM.
 
-    Returns parsed JSON (usually a list of dicts) or None on failure.
+    Returns a list of per-station dicts or None on failure.
     """
     global METAR_STATION_ID, METAR_SOCKET_TIMEOUT_S, METAR_FETCH_RETRIES
 
     if METAR_STATION_ID is None or METAR_SOCKET_TIMEOUT_S is None or METAR_FETCH_RETRIES is None:
         startupMetar()
 
-    # Time sync from internet (Zulu/UTC) – do once.
-    # We only try when WiFi is connected and internet appears reachable.
-    try:
-        if wlan is not None and wlan.isconnected() and not _time_synced:
-            if _internet_check_google():
-                sync_time_ntp()
-    except Exception:
-        pass
-
     ids = _format_station_ids(station_ids) or METAR_STATION_ID
     timeout_s = METAR_SOCKET_TIMEOUT_S if METAR_SOCKET_TIMEOUT_S is not None else 8
-    retries = METAR_FETCH_RETRIES if METAR_FETCH_RETRIES is not None else 3
 
     path = "/api/data/metar?ids={}&format=json".format(ids)
 
-    for attempt in range(1, retries + 1):
-        s = None
-        ss = None
-        try:
-            gc.collect()
+    metarFetchInfo["status"] = None
+    metarFetchInfo["not_modified"] = False
+    metarFetchInfo["unchanged"] = False
 
-            addr = socket.getaddrinfo(METAR_HOST, METAR_PORT)[0][-1]
-            print("Resolved", METAR_HOST, "to", addr, "(attempt", attempt, "of", retries, ")")
+    attempt = [0]
 
-            s = socket.socket()
-            try:
-                s.settimeout(timeout_s)
-            except Exception:
-                pass
-            s.connect(addr)
+    async def _attempt(deadline):
+        attempt[0] += 1
+        gc.collect()
+        print("METAR request", METAR_HOST, "(attempt", attempt[0], "of", METAR_RETRY.attempts, ")")
 
-            ss = _wrap_tls(s, METAR_HOST)
-            # Some MicroPython SSL sockets don't expose settimeout().
-            try:
-                settimeout = getattr(ss, "settimeout", None)
-                if settimeout:
-                    settimeout(timeout_s)
-            except Exception:
-                pass
+        resp = await httpclient.aget(
+            METAR_HOST,
+            path,
+            port=METAR_PORT,
+            headers=_metar_request_headers(path),
+            timeout_s=deadline.timeout_s(timeout_s),
+        )
+        try:
+            metarFetchInfo["status"] = resp.status
+            # Any HTTP answer means the network path works.
+            reportRequestResult(True)
 
-            # HTTP/1.0 avoids chunked transfer encoding complexity.
-            req = (
-                "GET {} HTTP/1.0\r\n"
-                "Host: {}\r\n"
-                "User-Agent: GroundBoardBA\r\n"
-                "Accept: application/json\r\n"
-                "Accept-Encoding: identity\r\n"
-                "Connection: close\r\n\r\n"
-            ).format(path, METAR_HOST)
+            if resp.status == 304 and _metar_records is not None:
+                print("get_metar_async: Not modified")
+                metarFetchInfo["not_modified"] = True
+                metarFetchInfo["unchanged"] = True
+                return _metar_records
 
-            try:
-                ss.write(req.encode())
-            except Exception:
-                ss.send(req.encode())
+            if resp.status >= 500 or resp.status == 429:
+                raise retry.RetryableError("HTTP {}".format(resp.status))
 
-            chunks = []
-            while True:
-                try:
-                    chunk = ss.read(1024)
-                except Exception:
-                    chunk = ss.recv(1024)
-                if not chunk:
+            if resp.status != 200:
+                print("get_metar_async: HTTP status", resp.status)
+                return None
+
+            # Stream the body through the METAR parser so only the configured
+            # fields are ever held in RAM, hashing it on the way past.
+            parser = MetarStreamParser(METAR_FIELDS)
+            digest = hashlib.sha1() if hashlib is not None else None
+            got_body = False
+            while not parser.complete:
+                view = await resp.aread_view()
+                if not view:
                     break
-                chunks.append(chunk)
+                got_body = True
+                if digest is not None:
+                    digest.update(view)
+                parser.feed(view)
 
-            response = b"".join(chunks)
-            header_end = response.find(b"\r\n\r\n")
-            if header_end == -1:
-                print("get_metar_raw: Header/Body split failed")
+            if not got_body:
+                print("get_metar_async: Empty body")
                 return None
 
-            header_bytes = response[:header_end]
-            body_bytes = response[header_end + 4 :]
-            status_line = header_bytes.split(b"\r\n", 1)[0]
+            records = parser.result()
+            if records is None:
+                if parser.valid:
+                    # Cut off mid-array: nothing from it is cached or shown;
+                    # try again under the retry policy.
+                    raise retry.RetryableError("truncated METAR body")
+                print("get_metar_async: Body is not a METAR array")
+                return None
 
-            status_code = None
-            try:
-                status_code = int(status_line.split(b" ")[1])
-            except Exception:
-                pass
+            digest = digest.digest() if digest is not None else None
+            _remember_metar(path, resp.headers, digest, records)
+            return records
+        except BaseException:
+            resp.abort()
+            raise
+        finally:
+            resp.close()
 
-            if status_code != 200:
-                print("get_metar_raw: HTTP status", status_code)
-                return None
+    try:
+        return await METAR_RETRY.acall(_attempt)
+    except Exception as e:
+        print("get_metar_async failed:", e)
+        if metarFetchInfo["status"] is None:
+            reportRequestResult(False)
+        return None
 
-            if not body_bytes:
-                print("get_metar_raw: Empty body")
-                return None
 
-            try:
-                body_text = body_bytes.decode("utf-8")
-            except Exception:
-                body_text = body_bytes.decode("latin-1")
+def _metar_request_headers(path):
+    headers = {"Accept": "application/json"}
+    if path == _metar_cache_path and _metar_records is not None:
+        if _metar_etag:
+            headers["If-None-Match"] = _metar_etag
+        if _metar_last_modified:
+            headers["If-Modified-Since"] = _metar_last_modified
+    return headers
 
-            return json.loads(body_text)
 
-        except OSError as e:
-            # Common transient timeout in MicroPython is ETIMEDOUT (110) reported as -110.
-            err = e.args[0] if getattr(e, "args", None) else e
-            if err in (-110, 110):
-                print("get_metar_raw timeout:", err)
-                _sleep_ms(200)
-                continue
-            print("get_metar_raw failed:", e)
-            return None
+def _remember_metar(path, headers, digest, records):
+    global _metar_cache_path, _metar_etag, _metar_last_modified
+    global _metar_digest, _metar_records
 
-        except Exception as e:
-            print("get_metar_raw failed:", e)
-            return None
+    same_path = (path == _metar_cache_path)
+    if same_path and digest is not None and digest == _metar_digest:
+        metarFetchInfo["unchanged"] = True
+    elif same_path and digest is None and records == _metar_records:
+        metarFetchInfo["unchanged"] = True
 
-        finally:
-            try:
-                if ss:
-                    ss.close()
-            except Exception:
-                pass
-            try:
-                if s:
-                    s.close()
-            except Exception:
-                pass
+    _metar_cache_path = path
+    _metar_etag = headers.get("etag")
+    _metar_last_modified = headers.get("last-modified")
+    _metar_digest = digest
+    _metar_records = records
 
-    return None
+
+def get_metar_raw(station_ids=None):
+    """Blocking wrapper around get_metar_async() for use outside the event loop (e.g. REPL)."""
+    return asyncio.run(get_metar_async(station_ids))
 
 
 def _decode_ssid(raw_ssid):
@@ -1035,17 +1162,124 @@ def _wlan_status_name(status_code):
     return str(status_code)
 
 
-def _internet_check_google(timeout_s=3):
-    """Ping-like internet check using Google generate_204 over HTTP.
+# ----- Connectivity Health -----
+# Health is inferred from how real requests (METAR fetches) turn out, so the
+# normal cycle costs no extra round trips. A separate probe only runs after
+# NET_PROBE_AFTER_FAILURES requests in a row have failed, to tell "the METAR
+# server is having trouble" (degraded) from "no internet at all" (down).
+NET_UNKNOWN = "unknown"
+NET_UP = "up"
+NET_DEGRADED = "degraded"
+NET_DOWN = "down"
+
+NET_PROBE_HOST = None
+NET_PROBE_PORT = None
+NET_PROBE_PATH = None
+NET_PROBE_AFTER_FAILURES = None
+
+_net_state = NET_UNKNOWN
+_net_failures = 0
+_net_last_ok_ms = None
+_net_last_probe_ms = None
+
+
+def startupHealth():
+    """Load connectivity probe and DNS cache settings from config.json."""
+    global NET_PROBE_HOST, NET_PROBE_PORT, NET_PROBE_PATH, NET_PROBE_AFTER_FAILURES
+
+    NET_PROBE_HOST = supportjson.readFromJSON("NET_PROBE_HOST") or "clients3.google.com"
+    port = supportjson.readFromJSON("NET_PROBE_PORT")
+    NET_PROBE_PORT = int(port) if port is not None else 80
+    NET_PROBE_PATH = supportjson.readFromJSON("NET_PROBE_PATH") or "/generate_204"
+    after = supportjson.readFromJSON("NET_PROBE_AFTER_FAILURES")
+    NET_PROBE_AFTER_FAILURES = int(after) if after is not None else 2
+
+    dns_ttl = supportjson.readFromJSON("DNS_TTL_S")
+    if dns_ttl is not None:
+        httpclient.DNS_TTL_S = int(dns_ttl)
+
+
+def _set_net_state(state):
+    global _net_state
+    if state != _net_state:
+        print("Connectivity:", _net_state, "->", state)
+        _net_state = state
+
+
+def getNetState():
+    """Current connectivity state: NET_UP, NET_DEGRADED, NET_DOWN or NET_UNKNOWN."""
+    if wlan is None or not wlan.isconnected():
+        return NET_DOWN
+    return _net_state
+
+
+def getNetStatus():
+    return {
+        "state": getNetState(),
+        "failures": _net_failures,
+        "last_ok_ms": _net_last_ok_ms,
+        "last_probe_ms": _net_last_probe_ms,
+    }
+
+
+def reportRequestResult(ok):
+    """Record the outcome of a real request (True if the server answered)."""
+    global _net_failures, _net_last_ok_ms
+
+    if ok:
+        _net_failures = 0
+        _net_last_ok_ms = utime.ticks_ms()
+        _set_net_state(NET_UP)
+        return
+
+    _net_failures += 1
+    if _net_state == NET_UP or _net_state == NET_UNKNOWN:
+        _set_net_state(NET_DEGRADED)
+
+
+def checkConnectivity():
+    """Decide whether a request is worth attempting right now.
+
+    No network traffic unless enough consecutive requests have failed; then a
+    single probe settles degraded vs down. Returns False when the link or the
+    internet is known to be down.
+    """
+    global _net_last_probe_ms
+
+    if NET_PROBE_AFTER_FAILURES is None:
+        startupHealth()
+
+    if wlan is None or not wlan.isconnected():
+        _set_net_state(NET_DOWN)
+        return False
+
+    if _net_failures < NET_PROBE_AFTER_FAILURES:
+        return True
+
+    _net_last_probe_ms = utime.ticks_ms()
+    if _internet_probe():
+        # Internet works; it's the real requests that are failing.
+        _set_net_state(NET_DEGRADED)
+        return True
+
+    _set_net_state(NET_DOWN)
+    return False
+
+
+def _internet_probe(timeout_s=3):
+    """Ping-like internet check: one small HTTP request to NET_PROBE_HOST.
 
     ICMP ping isn't consistently available in MicroPython, so we treat:
     - DNS resolve + TCP connect + HTTP response as "internet working".
     """
-    host = "clients3.google.com"
-    port = 80
+    if NET_PROBE_HOST is None:
+        startupHealth()
+
+    host = NET_PROBE_HOST
+    port = NET_PROBE_PORT
 
     try:
-        addr = socket.getaddrinfo(host, port)[0][-1]
+        addr = httpclient.resolve(host, port)
     except Exception as e:
         print("Internet check: DNS failed:", e)
         return False
@@ -1058,8 +1292,16 @@ def _internet_check_google(timeout_s=3):
         except Exception:
             pass
 
-        s.connect(addr)
-        req = "GET /generate_204 HTTP/1.1\r\nHost: {}\r\nConnection: close\r\n\r\n".format(host)
+        try:
+            s.connect(addr)
+        except Exception:
+            httpclient.expire_dns(host, port)
+            raise
+        if port != 80:
+            host_hdr = "{}:{}".format(host, port)
+        else:
+            host_hdr = host
+        req = "GET {} HTTP/1.1\r\nHost: {}\r\nConnection: close\r\n\r\n".format(NET_PROBE_PATH, host_hdr)
         s.send(req.encode())
         data = s.recv(64)
         if not data:
@@ -1076,50 +1318,144 @@ def _internet_check_google(timeout_s=3):
         except Exception:
             pass
 
-def startupWifi():
-    global WIFI_SSID, WIFI_PASSWORD, MAX_WIFI_WAIT, wlan
 
-    #Initalize Wifi Variables from JSON Config if not already set
-    if( WIFI_SSID is None):
-        WIFI_SSID = supportjson.readFromJSON("WIFI_SSID")
-    if( WIFI_PASSWORD is None):
-        WIFI_PASSWORD = supportjson.readFromJSON("WIFI_PASSWORD")
-    if( MAX_WIFI_WAIT is None):
-        MAX_WIFI_WAIT = supportjson.readFromJSON("MAX_WIFI_WAIT")
+def _internet_check_google(timeout_s=3):
+    """Run the connectivity probe now and fold the result into the health state."""
+    global _net_failures, _net_last_probe_ms
+
+    _net_last_probe_ms = utime.ticks_ms()
+    ok = _internet_probe(timeout_s)
+    if ok:
+        _net_failures = 0
+        _set_net_state(NET_UP)
+    else:
+        _set_net_state(NET_DOWN)
+    return ok
 
-    print("WiFi Config - SSID:", WIFI_SSID, "Password:", WIFI_PASSWORD, "Max Wait:", MAX_WIFI_WAIT)
+# ----- Fast Reconnect -----
+# The AP we last joined successfully. A reconnect to the same SSID goes
+# straight to it (by BSSID) without power-cycling the radio or scanning;
+# the full reset + scan path only runs if that fails.
+WIFI_FAST_CONNECT_MS = None
+_WIFI_FAST_POLL_MS = 100
 
-    # If SSID is blank, treat WiFi as not configured.
-    if WIFI_SSID is None or str(WIFI_SSID).strip() == "":
+_last_ap = None  # {"ssid", "bssid" (bytes), "channel"}
+
+
+def _load_last_ap():
+    global _last_ap, WIFI_FAST_CONNECT_MS
+
+    if WIFI_FAST_CONNECT_MS is None:
+        ms = supportjson.readFromJSON("WIFI_FAST_CONNECT_MS")
+        WIFI_FAST_CONNECT_MS = int(ms) if ms is not None else 3000
+
+    if _last_ap is not None:
+        return
+    ssid = supportjson.readFromJSON("WIFI_LAST_SSID")
+    bssid = supportjson.readFromJSON("WIFI_LAST_BSSID")
+    if not ssid or not bssid:
+        return
+    try:
+        bssid = bytes(int(bssid[i:i + 2], 16) for i in range(0, len(bssid), 2))
+    except Exception:
+        return
+    _last_ap = {
+        "ssid": ssid,
+        "bssid": bssid,
+        "channel": supportjson.readFromJSON("WIFI_LAST_CHANNEL"),
+    }
+
+
+def _remember_ap(nets):
+    # Pick the strongest scan entry for our SSID and keep it (in RAM and in
+    # config.json, which is only rewritten when it actually changed).
+    global _last_ap
+
+    best = None
+    for net in nets or ():
         try:
-            DisplayI2C.displayClear()
-            DisplayI2C.display_row0 = "WiFi"
-            DisplayI2C.display_row1 = "Not Configured"
-            DisplayI2C.display_row3 = "SSID"
-            DisplayI2C.display_row4 = "(none)"
-            DisplayI2C.display_row6 = "AP Button"
-            DisplayI2C.display_row7 = "to Setup"
-            DisplayI2C.displayRefresh()
+            if _decode_ssid(net[0]) != WIFI_SSID:
+                continue
+            if best is None or net[3] > best[3]:
+                best = net
         except Exception:
             pass
+    if best is None:
+        return
 
-        return {
-            "wifi_connected": False,
-            "internet_ok": False,
-            "reason": "no_ssid_configured",
-            "status": None,
-            "ssid_found": False,
-        }
-    
-    #Setup display for WiFi Connection Status
-    DisplayI2C.displayClear()
-    DisplayI2C.display_row0 = "WiFi"
-    DisplayI2C.display_row1 = "Connecting"
-    DisplayI2C.display_row3 = "SSID"
-    DisplayI2C.display_row4 = WIFI_SSID
-    DisplayI2C.display_row6 = "Initializing"
+    bssid = bytes(best[1])
+    _last_ap = {"ssid": WIFI_SSID, "bssid": bssid, "channel": best[2]}
+    supportjson.writeManyToJSON({
+        "WIFI_LAST_SSID": WIFI_SSID,
+        "WIFI_LAST_BSSID": "".join("{:02x}".format(b) for b in bssid),
+        "WIFI_LAST_CHANNEL": best[2],
+    })
+
+
+def _fast_connect_possible():
+    _load_last_ap()
+    return _last_ap is not None and _last_ap.get("ssid") == WIFI_SSID
+
+
+def _fast_connect_steps():
+    # Generator (see _startup_wifi_steps): returns True once connected.
+    global wlan
+
+    wlan = network.WLAN(network.STA_IF)
+    try:
+        wlan.active(True)
+    except Exception:
+        pass
+
+    #Disable power saving on Pico W WiFi chip for reliability
+    try:
+        wlan.config(pm=0xa11140)
+    except Exception:
+        pass
+
+    if wlan.isconnected():
+        return True
+
+    DisplayI2C.set_row(6, "Fast Connect")
     DisplayI2C.displayRefresh()
 
+    print("WiFi fast connect: bssid", _last_ap["bssid"], "channel", _last_ap.get("channel"))
+    try:
+        wlan.connect(WIFI_SSID, WIFI_PASSWORD, bssid=_last_ap["bssid"])
+    except TypeError:
+        # Port without the bssid keyword: still skips the reset and scan.
+        try:
+            wlan.connect(WIFI_SSID, WIFI_PASSWORD)
+        except Exception as e:
+            print("wlan.connect() raised:", e)
+            return False
+    except Exception as e:
+        print("wlan.connect() raised:", e)
+        return False
+
+    waited = 0
+    while waited < WIFI_FAST_CONNECT_MS:
+        if wlan.isconnected():
+            print("WiFi fast connect took", waited, "ms")
+            return True
+        try:
+            status = wlan.status()
+        except Exception:
+            status = None
+        if status in (-3, -2, -1):
+            break
+        yield _WIFI_FAST_POLL_MS
+        waited += _WIFI_FAST_POLL_MS
+
+    print("WiFi fast connect failed; falling back to full reset + scan")
+    return False
+
+
+def _slow_connect_steps():
+    # Generator (see _startup_wifi_steps): full radio reset, scan and connect.
+    # Returns (ssid_found, last_status, fail_reason).
+    global wlan
+
     #Initialize WiFi Turn off and On to reset
     wlan = network.WLAN(network.STA_IF)
 
@@ -1127,13 +1463,13 @@ def startupWifi():
         wlan.active(False)
     except Exception:
         pass
-    sleep(.25)
+    yield 250
 
     try:
         wlan.active(True)
     except Exception:
         pass
-    sleep(.25)
+    yield 250
 
     #Disable power saving on Pico W WiFi chip for reliability
     try:
@@ -1141,7 +1477,7 @@ def startupWifi():
     except Exception:
         pass
     wlan.disconnect()
-    sleep(1)
+    yield 1000
 
     #Scan for networks
     nets = []
@@ -1166,7 +1502,7 @@ def startupWifi():
     else:
         wifiWait = MAX_WIFI_WAIT
     
-    DisplayI2C.display_row6 = "Time Remaining"
+    DisplayI2C.set_row(6, "Time Remaining")
 
     last_status = None
     fail_reason = None
@@ -1191,13 +1527,80 @@ def startupWifi():
             break
 
         wifiWait -= 1
-        DisplayI2C.display_row7 = str(wifiWait)
+        DisplayI2C.set_row(7, str(wifiWait))
         DisplayI2C.displayRefresh()
         if last_status is None:
             print('waiting for connection...')
         else:
             print('waiting for connection... status=', _wlan_status_name(last_status))
-        sleep(1)
+        yield 1000
+
+    if wlan.isconnected():
+        _remember_ap(nets)
+
+    return ssid_found, last_status, fail_reason
+
+
+def _startup_wifi_steps(sync_time=True):
+    # Connection sequence as a generator: it yields an int for every pause (ms)
+    # and finally the status dict, so the same steps can run blocking
+    # (startupWifi) or as an asyncio task (startupWifiAsync).
+    global WIFI_SSID, WIFI_PASSWORD, MAX_WIFI_WAIT, wlan
+
+    #Initalize Wifi Variables from JSON Config if not already set
+    if( WIFI_SSID is None):
+        WIFI_SSID = supportjson.readFromJSON("WIFI_SSID")
+    if( WIFI_PASSWORD is None):
+        WIFI_PASSWORD = supportjson.readFromJSON("WIFI_PASSWORD")
+    if( MAX_WIFI_WAIT is None):
+        MAX_WIFI_WAIT = supportjson.readFromJSON("MAX_WIFI_WAIT")
+
+    print("WiFi Config - SSID:", WIFI_SSID, "Password:", WIFI_PASSWORD, "Max Wait:", MAX_WIFI_WAIT)
+
+    # If SSID is blank, treat WiFi as not configured.
+    if WIFI_SSID is None or str(WIFI_SSID).strip() == "":
+        try:
+            DisplayI2C.displayClear()
+            DisplayI2C.set_row(0, "WiFi")
+            DisplayI2C.set_row(1, "Not Configured")
+            DisplayI2C.set_row(3, "SSID")
+            DisplayI2C.set_row(4, "(none)")
+            DisplayI2C.set_row(6, "AP Button")
+            DisplayI2C.set_row(7, "to Setup")
+            DisplayI2C.displayRefresh()
+        except Exception:
+            pass
+
+        yield {
+            "wifi_connected": False,
+            "internet_ok": False,
+            "reason": "no_ssid_configured",
+            "status": None,
+            "ssid_found": False,
+        }
+        return
+    
+    #Setup display for WiFi Connection Status
+    DisplayI2C.displayClear()
+    DisplayI2C.set_row(0, "WiFi")
+    DisplayI2C.set_row(1, "Connecting")
+    DisplayI2C.set_row(3, "SSID")
+    DisplayI2C.set_row(4, WIFI_SSID)
+    DisplayI2C.set_row(6, "Initializing")
+    DisplayI2C.displayRefresh()
+
+    ssid_found = True
+    last_status = None
+    fail_reason = None
+    fast = False
+
+    # Reconnect straight to the AP we last joined; only power-cycle the radio
+    # and scan when that doesn't work.
+    if _fast_connect_possible():
+        fast = yield from _fast_connect_steps()
+
+    if not fast:
+        ssid_found, last_status, fail_reason = yield from _slow_connect_steps()
 
     # Post-wait: classify result + (if connected) check internet.
     if not wlan.isconnected():
@@ -1210,23 +1613,24 @@ def startupWifi():
             else:
                 fail_reason = "connect_failed"
 
-        DisplayI2C.display_row6 = "WiFi Failed"
+        DisplayI2C.set_row(6, "WiFi Failed")
         if fail_reason == "no_ssid_found":
-            DisplayI2C.display_row7 = "AP Not Found"
+            DisplayI2C.set_row(7, "AP Not Found")
         elif fail_reason == "password_incorrect":
-            DisplayI2C.display_row7 = "Bad Password"
+            DisplayI2C.set_row(7, "Bad Password")
         else:
-            DisplayI2C.display_row7 = "Connection ERR"
+            DisplayI2C.set_row(7, "Connection ERR")
         DisplayI2C.displayRefresh()
 
         print("WiFi connect failed. reason=", fail_reason, "status=", _wlan_status_name(last_status))
-        return {
+        yield {
             "wifi_connected": False,
             "internet_ok": False,
             "reason": fail_reason,
             "status": last_status,
             "ssid_found": ssid_found,
         }
+        return
 
     # Connected to WiFi (has IP) - show IP then verify internet.
     try:
@@ -1234,28 +1638,31 @@ def startupWifi():
     except Exception:
         ip = None
 
-    DisplayI2C.display_row6 = "Connected"
+    DisplayI2C.set_row(6, "Connected")
     DisplayI2C.displayRefresh()
 
     internet_ok = _internet_check_google()
     if internet_ok:
-        sync_time_ntp()
-        DisplayI2C.display_row6 = "Internet Check"
-        DisplayI2C.display_row7 = "Passed"
+        if sync_time:
+            sync_time_ntp()
+        DisplayI2C.set_row(6, "Internet Check")
+        DisplayI2C.set_row(7, "Passed")
     else:
-        DisplayI2C.display_row6 = "Internet Check"
-        DisplayI2C.display_row7 = "Failed"
+        DisplayI2C.set_row(6, "Internet Check")
+        DisplayI2C.set_row(7, "Failed")
     DisplayI2C.displayRefresh()
-    sleep(1)
+    if not fast:
+        yield 1000
 
-    print("WiFi connected. ip=", ip, "internet_ok=", internet_ok)
-    return {
+    print("WiFi connected. ip=", ip, "internet_ok=", internet_ok, "fast=", fast)
+    yield {
         "wifi_connected": True,
         "internet_ok": internet_ok,
         "reason": None if internet_ok else "no_internet",
         "status": last_status,
         "ssid_found": ssid_found,
         "ip": ip,
+        "fast": fast,
     }
 
 
@@ -1264,3 +1671,31 @@ def startupWifi():
 
 
 
+
+
+def _run_wifi_steps(steps):
+    for step in steps:
+        if isinstance(step, dict):
+            return step
+        _sleep_ms(step)
+    return None
+
+
+def startupWifi():
+    """Connect to the configured WiFi network, blocking until done.
+
+    Returns a status dict (wifi_connected, internet_ok, reason, status, ...).
+    """
+    return _run_wifi_steps(_startup_wifi_steps())
+
+
+async def startupWifiAsync():
+    """Same as startupWifi(), but pauses yield to other asyncio tasks.
+
+    The clock is not synced here; run sync_time_ntp_async() from its own task.
+    """
+    for step in _startup_wifi_steps(sync_time=False):
+        if isinstance(step, dict):
+            return step
+        await _asleep_ms(step)
+    return None